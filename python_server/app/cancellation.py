@@ -0,0 +1,154 @@
+"""
+Cancelling the pipeline when nobody is waiting for its result any more.
+
+Identical concurrent requests share one run (singleflight). Each request polls its connection
+while it waits; when the last waiter of a run disconnects, the run's CancelToken is cancelled
+and the worker thread stops at its next LLM call or stage boundary by raising RequestCancelled.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import os
+import threading
+
+class RequestCancelled(BaseException):
+    """
+    Raised inside a cancelled run. A BaseException, like asyncio.CancelledError, so the crews'
+    `except Exception` retry loops let it through instead of retrying.
+    """
+
+class ClientDisconnected(Exception):
+    """The client went away before its result was ready."""
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self.llm_calls = 0
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+_current_token: ContextVar[Optional[CancelToken]] = ContextVar("cancel_token", default=None)
+
+def check_cancelled() -> None:
+    """Raise RequestCancelled if the current request's run has been cancelled."""
+    token = _current_token.get()
+    if token is not None and token.cancelled:
+        raise RequestCancelled()
+
+def count_llm_call() -> None:
+    token = _current_token.get()
+    if token is not None:
+        token.llm_calls += 1
+
+@contextmanager
+def cancellable(token: CancelToken):
+    reset = _current_token.set(token)
+    try:
+        yield
+    finally:
+        _current_token.reset(reset)
+
+class CancellationStats:
+    """Runs cancelled and coalesced, and an estimate of the LLM calls cancellation saved."""
+
+    def __init__(self):
+        self.runs_completed = 0
+        self.runs_cancelled = 0
+        self.requests_coalesced = 0
+        self.llm_calls_completed_runs = 0
+        self.llm_calls_cancelled_runs = 0
+        self._lock = threading.Lock()
+
+    def finished(self, token: CancelToken, cancelled: bool) -> None:
+        with self._lock:
+            if cancelled:
+                self.runs_cancelled += 1
+                self.llm_calls_cancelled_runs += token.llm_calls
+            else:
+                self.runs_completed += 1
+                self.llm_calls_completed_runs += token.llm_calls
+
+    def coalesced(self) -> None:
+        with self._lock:
+            self.requests_coalesced += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            calls_per_run = self.llm_calls_completed_runs / self.runs_completed if self.runs_completed else 0.0
+            return {
+                "runs_completed": self.runs_completed,
+                "runs_cancelled": self.runs_cancelled,
+                "requests_coalesced": self.requests_coalesced,
+                "llm_calls_per_completed_run": round(calls_per_run, 2),
+                #what the cancelled runs would have made had they finished, minus what they did make
+                "llm_calls_saved_estimate": round(max(0.0, calls_per_run * self.runs_cancelled - self.llm_calls_cancelled_runs), 1),
+            }
+
+cancellation_stats = CancellationStats()
+
+class _Flight:
+    def __init__(self):
+        self.token = CancelToken()
+        self.waiters = 0
+        self.future: Optional[asyncio.Future] = None
+
+class Singleflight:
+    """Run `fn` once per key for all concurrent callers, cancelling it when the last caller disconnects."""
+
+    def __init__(self, poll_interval: float = 0.5):
+        self.poll_interval = poll_interval
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    async def run(self, key: Optional[Hashable], is_disconnected: Callable[[], Awaitable[bool]], fn: Callable, *args) -> Any:
+        """The result of fn(*args) run in the threadpool; a None key never coalesces. Raises ClientDisconnected."""
+        flight = self._flights.get(key) if key is not None else None
+        if flight is None:
+            flight = _Flight()
+            flight.future = asyncio.ensure_future(run_in_threadpool(self._run_thread, flight.token, fn, *args))
+            #a cancelled run ends in RequestCancelled after its waiters left; retrieve it so asyncio does not warn
+            flight.future.add_done_callback(lambda future: future.cancelled() or future.exception())
+            if key is not None:
+                self._flights[key] = flight
+                flight.future.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            cancellation_stats.coalesced()
+
+        flight.waiters += 1
+        try:
+            while True:
+                done, _ = await asyncio.wait({flight.future}, timeout=self.poll_interval)
+                if done:
+                    return flight.future.result()
+                if await is_disconnected():
+                    raise ClientDisconnected()
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.future.done():
+                #nobody is left to read the result; a request arriving now starts a fresh run
+                flight.token.cancel()
+                self._forget(key, flight)
+                print("Client disconnected, cancelling the remaining pipeline")
+
+    def _forget(self, key: Optional[Hashable], flight: _Flight) -> None:
+        if key is not None and self._flights.get(key) is flight:
+            del self._flights[key]
+
+    @staticmethod
+    def _run_thread(token: CancelToken, fn: Callable, *args) -> Any:
+        with cancellable(token):
+            try:
+                result = fn(*args)
+            except RequestCancelled:
+                cancellation_stats.finished(token, cancelled=True)
+                raise
+        cancellation_stats.finished(token, cancelled=token.cancelled)
+        return result
+
+singleflight = Singleflight(poll_interval=float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5")))
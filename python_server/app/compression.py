@@ -0,0 +1,105 @@
+import gzip
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q-values."""
+    offered: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        pieces = part.strip().split(";")
+        coding = pieces[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in pieces[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        offered[coding] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [
+        (offered.get(coding, offered.get("*", 0.0)), -rank, coding)
+        for rank, coding in enumerate(supported)
+    ]
+    quality, _, coding = max(candidates)
+    return coding if quality > 0 else None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+class CompressionMiddleware:
+    """
+    Compress large JSON responses with brotli or gzip, whichever the client prefers.
+
+    Plan responses are built in one piece, so the body is buffered and compressed once
+    instead of being streamed through a compressor.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = choose_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        chunks: List[bytes] = []
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = [(name, value) for name, value in start_message["headers"]]
+            header_names = {name.lower() for name, _ in headers}
+            content_type = next((value.decode("latin-1") for name, value in headers if name.lower() == b"content-type"), "")
+
+            if (
+                len(body) >= self.minimum_size
+                and b"content-encoding" not in header_names
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                body = compress(body, encoding)
+                headers = [(name, value) for name, value in headers if name.lower() != b"content-length"]
+                headers += [
+                    (b"content-encoding", encoding.encode("latin-1")),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ]
+            headers.append((b"vary", b"Accept-Encoding"))
+
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,44 @@
+from crewai import BaseLLM
+from typing import Optional
+import os
+import random
+import time
+from .fake_responses import MALFORMATIONS, fake_agent_answer, fake_json_answer, prompt_text
+
+#one generator per process, so every crew's FakeLLM does not replay the same draws
+_rng = random.Random(os.getenv("FAKE_LLM_SEED"))
+
+class FakeLLM(BaseLLM):
+    """
+    Offline stand-in for the Gemini LLM.
+
+    Answers in the ReAct format crewai agents expect, or with bare JSON when the
+    call carries a response_model (JSON mode), with a configurable latency
+    (FAKE_LLM_LATENCY_MS) so benchmarks see realistic request shapes.
+    FAKE_LLM_MALFORMED_RATE damages that share of free-text JSON answers, and
+    FAKE_LLM_JSON_MALFORMED_RATE truncates that share of JSON-mode answers. The latter
+    defaults to a fifth of the former (truncation being one of the five ways free text
+    breaks), an assumption of the fake rather than a measured provider rate.
+    """
+
+    def __init__(self, temperature: Optional[float] = None):
+        super().__init__(model="fake/plansauce", temperature=temperature)
+        self.latency = float(os.getenv("FAKE_LLM_LATENCY_MS", "200")) / 1000
+        self.malformed_rate = float(os.getenv("FAKE_LLM_MALFORMED_RATE", "0"))
+        self.json_malformed_rate = float(os.getenv("FAKE_LLM_JSON_MALFORMED_RATE", self.malformed_rate / len(MALFORMATIONS)))
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs) -> str:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if kwargs.get("response_model") is not None:
+            return fake_json_answer(prompt_text(messages), _rng, self.json_malformed_rate)
+        return fake_agent_answer(prompt_text(messages), _rng, self.malformed_rate)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 1_000_000
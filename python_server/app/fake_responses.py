@@ -0,0 +1,104 @@
+"""Canned model answers for the offline backends: FakeLLM and the load-test Gemini stand-in."""
+from typing import Any, Dict, List, Optional, Union
+import json
+import random
+import re
+
+CATEGORIES = ["setup", "frontend", "backend", "testing", "deploy", "maintain"]
+
+FAKE_TECH = {
+    "setup": ("Vite", "https://vitejs.dev/guide/"),
+    "frontend": ("React", "https://react.dev/learn"),
+    "backend": ("FastAPI", "https://fastapi.tiangolo.com/"),
+    "testing": ("Vitest", "https://vitest.dev/guide/"),
+    "deploy": ("Vercel", "https://vercel.com/docs"),
+    "maintain": ("Sentry", "https://docs.sentry.io/"),
+}
+
+def prompt_text(messages: Union[str, List[Dict[str, str]]]) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+def fake_tech_stack(project_type: str = "Web Application") -> Dict[str, Any]:
+    stack = {"type": project_type}
+    for category, (name, doc_link) in FAKE_TECH.items():
+        stack[category] = [{
+            "name": name,
+            "description": f"{name} is a widely used {category} tool that fits this project and keeps the workflow simple for the team.",
+            "docLink": doc_link
+        }]
+    return stack
+
+def fake_category_tasks(category: str, task_count: int = 3, subtask_count: int = 3) -> Dict[str, Any]:
+    tasks = []
+    for i in range(task_count):
+        tasks.append({
+            "id": f"task-{i+1}",
+            "text": f"Complete {category} step {i+1} for the project",
+            "completed": False,
+            "category": category,
+            "subtasks": [
+                {
+                    "id": f"subtask-{i+1}-{j+1}",
+                    "text": f"Carry out part {j+1} of {category} step {i+1} with the recommended tools",
+                    "completed": False
+                }
+                for j in range(subtask_count)
+            ]
+        })
+    return {"tasks": tasks}
+
+def fake_completion(prompt: str) -> str:
+    """Return the JSON (or prose) a well-behaved model would answer `prompt` with."""
+    category_match = re.search(r"task breakdown for the (\w+) category", prompt)
+    if category_match:
+        return json.dumps(fake_category_tasks(category_match.group(1)), indent=2)
+
+    if "educational prompt for the following software development task" in prompt:
+        subtasks = re.findall(r"^\s*\d+\. (.+)$", prompt.split("SUBTASKS:", 1)[-1].split("Technologies to consider:", 1)[0], re.M)
+        return json.dumps({
+            "prompt": "Explain step by step how to complete this task, why it matters and which pitfalls to avoid.",
+            "subtaskPrompts": [f"Walk me through how to {subtask[0].lower() + subtask[1:]}" for subtask in subtasks]
+        }, indent=2)
+
+    if "tech stack recommendation" in prompt:
+        type_match = re.search(r'"type": "([^"]+)"', prompt)
+        return json.dumps(fake_tech_stack(type_match.group(1) if type_match else "Web Application"), indent=2)
+
+    return "Research findings: " + "; ".join(
+        f"{category}: {name} ({doc_link})" for category, (name, doc_link) in FAKE_TECH.items()
+    )
+
+#ways free-text JSON answers go wrong; only truncation (hitting the token limit) survives JSON mode
+MALFORMATIONS = ("prose", "bare_fence", "trailing_comma", "python_dict", "truncated")
+
+def malformed_answer(answer: str, kind: str) -> str:
+    """Damage a JSON answer the way real model output is damaged."""
+    if kind == "prose":
+        return f"Here is the JSON you asked for:\n{answer}\nLet me know if you would like any changes."
+    if kind == "bare_fence":
+        return f"```\n{answer}\n```"
+    if kind == "trailing_comma":
+        closing = answer.rfind("}")
+        return f"```json\n{answer[:closing]},{answer[closing:]}\n```"
+    if kind == "python_dict":
+        return repr(json.loads(answer))
+    return answer[:int(len(answer) * 0.8)]
+
+def fake_agent_answer(prompt: str, rng: Optional[random.Random] = None, malformed_rate: float = 0.0) -> str:
+    """Wrap the canned answer in the ReAct format crewai agents parse, damaging a share of the JSON ones."""
+    answer = fake_completion(prompt)
+    if answer.startswith("{"):
+        if rng and rng.random() < malformed_rate:
+            answer = malformed_answer(answer, rng.choice(MALFORMATIONS))
+        else:
+            answer = f"```json\n{answer}\n```"
+    return f"Thought: I now can give a great answer\nFinal Answer: {answer}"
+
+def fake_json_answer(prompt: str, rng: Optional[random.Random] = None, malformed_rate: float = 0.0) -> str:
+    """The bare JSON document a provider's JSON mode returns; only truncation, at `malformed_rate`, can still break it."""
+    answer = fake_completion(prompt)
+    if rng and rng.random() < malformed_rate:
+        answer = malformed_answer(answer, "truncated")
+    return answer
@@ -1,13 +1,52 @@
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager, contextmanager
 from typing import Dict, List, Any, Optional
-from .tech_stack_curator import TechStackCuratorCrew
-from .task_curator import TaskGenerationCrew
-
-#from .prompt_engineer import PromptGenerationCrew
+from .warmup import load_crews, load_prompt_crew, mark_ready, start_warmup, is_ready, readiness
+from .replan import CATEGORIES, apply_stack_edits, merge_replanned_tasks
+from .compression import CompressionMiddleware
+from .plan_store import plan_store, etag_matches
+from .profiling import hotspot_sampler, is_trusted, requested_profile, run_profiled
+from .metrics import llm_route_metrics
+from .limiter import BATCH, INTERACTIVE, llm_limiter, priority
+from .profile_warmer import profile_key, profile_warmer
+from .cancellation import ClientDisconnected, cancellation_stats, check_cancelled, singleflight
+from .cache import stable_hash
+from .schemas import parse_stats
+from .records import stack_to_dict, tasks_to_dicts
 import os
+import threading
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+@contextmanager
+def track_in_flight():
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+    try:
+        yield
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    #crewai is imported lazily; warm it up in the background so the worker can bind right away
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        start_warmup()
+    if os.getenv("PROFILE_SAMPLING", "false").lower() == "true":
+        hotspot_sampler.start()
+    if os.getenv("WARMER_ENABLED", "false").lower() == "true":
+        profile_warmer.start()
+    yield
+    profile_warmer.stop()
+    #uvicorn stops accepting connections and waits for open requests before we get here
+    print(f"Shutting down worker {os.getpid()} with {_in_flight} plans still in flight")
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +55,27 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")))
+
+def plan_response(plan: Dict[str, Any], profile=None) -> Response:
+    """Store a plan and send it pre-serialized, with an ETag for conditional fetches by id."""
+    plan_id, body, etag = plan_store.save(plan)
+    headers = {"ETag": etag, "X-Plan-Id": plan_id}
+    if profile:
+        headers["X-Profile-Id"] = profile.profile_id
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def run_pipeline(request: Request, label: str, data: Dict[str, Any], fn, *args):
+    """
+    Run a blocking pipeline off the event loop (crews block on LLM calls). Identical concurrent requests
+    share one run, which is cancelled once every client waiting for it has disconnected.
+    """
+    profile = requested_profile(request.headers, label)
+    #a profiled request measures its own run, so it is never coalesced
+    key = None if profile else (label, stable_hash(data))
+    with track_in_flight():
+        result = await singleflight.run(key, request.is_disconnected, run_profiled, profile, fn, *args)
+    return result, profile
 
 def infer_project_type(description: str, known_tech: List[str] = None, starred_tech: List[str] = None) -> str:
     description_lower = description.lower()
@@ -71,68 +131,239 @@ def infer_experience_level(known_tech: List[str], starred_tech: List[str]) -> st
     else:
         return "Beginner - New to development or learning the basics with limited framework exposure and focused on building core skills."
 
+def build_plan(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the blocking curation + task generation pipeline for one request."""
+    description = data.get('description') #project idea
+    priority = data.get('priority', '') #speed, scalability 
+
+    background = data.get('background', {}) 
+    known_tech = background.get('known_tech', [])
+    disliked_tech = background.get('disliked_tech', [])
+    starred_tech = background.get('starred_tech', [])
+    
+    project_type = infer_project_type(description, known_tech, starred_tech)
+    print(f"Inferred project type: {project_type}")
+    
+    experience_level = infer_experience_level(known_tech, starred_tech)
+    print(f"Inferred experience level: {experience_level}")
+
+    #popular profiles are kept warm in the background; a warm one lets the crews skip research
+    profile = profile_key(project_type, priority, experience_level)
+    profile_warmer.record(profile)
+    warm = profile_warmer.warm_entry(profile)
+
+    TechStackCuratorCrew, TaskGenerationCrew = load_crews()
+
+    #curates personalized tech stack based on project type, priority, and user background
+    tech_stack_curator = TechStackCuratorCrew(api_key=os.getenv("BRAVE_API_KEY"))
+    tech_stack_recommendation = tech_stack_curator.curate_tech_stack(
+        project_type=project_type,
+        priority=priority,
+        experience_level=experience_level,
+        project_description=description,
+        known_tech=known_tech,
+        disliked_tech=disliked_tech,
+        starred_tech=starred_tech,
+        research_findings=warm.get("research_findings"),
+        #warm findings describe a typical project of the profile; replacing this plan's own research is opt-in
+        skip_research=os.getenv("WARMER_SKIP_RESEARCH", "false").lower() == "true",
+        fallback_stack=warm.get("tech_stack")
+    )
+    
+    tech_stack_by_category = {}
+    
+    #hand the curated records to task generation by category; the lists are shared, not copied
+    if isinstance(tech_stack_recommendation, dict) and "error" not in tech_stack_recommendation:
+        for category in ["setup", "frontend", "backend", "testing", "deploy", "maintain"]:
+            if category in tech_stack_recommendation:
+                tech_stack_by_category[category] = tech_stack_recommendation[category]
+    
+    # print(f"Techstack by category: {tech_by_category}")
+
+    #the client may have given up during curation
+    check_cancelled()
+    crew = TaskGenerationCrew()
+    #both crews built fine, so the worker can serve plans even if the startup warmup failed or was skipped
+    mark_ready()
+    result = crew.generate_tasks(
+        project_description = description,
+        priority = priority,
+        tech_stack_by_category = tech_stack_by_category,
+        project_type = project_type,
+        template_tasks_by_category = warm.get("task_templates"),
+        template_tech_stack = warm.get("tech_stack")
+    )
+    
+    tasks = result.get("tasks", [])
+    #print(f"Generated tasks: {tasks}")
+    
+    #the records become dicts only here, at the response boundary
+    return {
+        "success": True,
+        "data": tasks_to_dicts(tasks),
+        "tech_stack": stack_to_dict(tech_stack_recommendation),
+        "project_type": project_type,
+        "priority": priority
+    }
+
+def build_replan(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply tech stack edits to an existing plan and regenerate only the affected categories."""
+    description = data.get('description', '')
+    priority = data.get('priority', '')
+    tech_stack = data.get('tech_stack') or {}
+    tasks = data.get('tasks') or []
+    edits = data.get('edits') or []
+    #malformed plans are the client's error (400), not ours
+    if not isinstance(tech_stack, dict):
+        raise ValueError("tech_stack must be an object of categories")
+    if not isinstance(tasks, list) or not all(isinstance(task, dict) for task in tasks):
+        raise ValueError("tasks must be a list of task objects")
+
+    project_type = data.get('project_type') or tech_stack.get('type') or infer_project_type(description)
+    new_stack, changed = apply_stack_edits(tech_stack, edits)
+    print(f"Replanning categories: {sorted(changed)}")
+
+    new_tasks_by_category = {}
+    failed = []
+    if changed:
+        _, TaskGenerationCrew = load_crews()
+        generated = TaskGenerationCrew().generate_category_tasks(
+            project_description=description,
+            priority=priority,
+            tech_stack_by_category={category: new_stack.get(category, []) for category in CATEGORIES},
+            project_type=project_type,
+            categories=[category for category in CATEGORIES if category in changed]
+        )
+        for category in changed:
+            #keep the old tasks of a category we could not regenerate rather than dropping them
+            if generated.get(category):
+                new_tasks_by_category[category] = tasks_to_dicts(generated[category])
+            else:
+                failed.append(category)
+
+    merged_tasks, diff = merge_replanned_tasks(tasks, new_tasks_by_category)
+    diff["failed"] = sorted(failed, key=CATEGORIES.index)
+
+    return {
+        "success": True,
+        "data": merged_tasks,
+        "tech_stack": new_stack,
+        "diff": diff,
+        "project_type": project_type,
+        "priority": priority
+    }
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once crewai, the agents and LLM clients have been initialized"""
+    return JSONResponse(status_code=200 if is_ready() else 503, content=readiness())
+
+@app.get("/metrics")
+async def metrics():
+    """Per-worker counters: the LLM concurrency limit, latency and errors of each LLM route and how answers were parsed"""
+    return {
+        "worker": os.getpid(),
+        "in_flight": _in_flight,
+        "llm_limiter": llm_limiter.snapshot(),
+        "llm_routes": llm_route_metrics(),
+        "profile_warmer": profile_warmer.snapshot(),
+        "cancellation": cancellation_stats.snapshot(),
+        "parsing": parse_stats(),
+    }
+
 @app.post("/api/generate-tasks")
 async def generate_tasks(request: Request):
     """Generate tasks for a project based on description, priority, and tech background"""
     try:
         data = await request.json()
         print(f"Received data: {data}")
-        
-        description = data.get('description') #project idea
-        priority = data.get('priority', '') #speed, scalability 
+        plan, profile = await run_pipeline(request, "generate-tasks", data, build_plan, data)
+        return plan_response(plan, profile)
 
-        background = data.get('background', {}) 
-        known_tech = background.get('known_tech', [])
-        disliked_tech = background.get('disliked_tech', [])
-        starred_tech = background.get('starred_tech', [])
-        
-        project_type = infer_project_type(description, known_tech, starred_tech)
-        print(f"Inferred project type: {project_type}")
-        
-        experience_level = infer_experience_level(known_tech, starred_tech)
-        print(f"Inferred experience level: {experience_level}")
-
-        #curates personalized tech stack based on project type, priority, and user background
-        tech_stack_curator = TechStackCuratorCrew(api_key=os.getenv("BRAVE_API_KEY"))
-        tech_stack_recommendation = tech_stack_curator.curate_tech_stack(
-            project_type=project_type,
-            priority=priority,
-            experience_level=experience_level,
-            project_description=description,
-            known_tech=known_tech,
-            disliked_tech=disliked_tech,
-            starred_tech=starred_tech
-        )
-        
-        tech_stack_by_category = {}
-        
-        #extract tech stack by category so we can pass this to the task generation
-        if isinstance(tech_stack_recommendation, dict) and "error" not in tech_stack_recommendation:
-            for category in ["setup", "frontend", "backend", "testing", "deploy", "maintain"]:
-                if category in tech_stack_recommendation:
-                    tech_stack_by_category[category] = tech_stack_recommendation[category]
-        
-        # print(f"Techstack by category: {tech_by_category}")
-        
-        crew = TaskGenerationCrew()
-        result = crew.generate_tasks(
-            project_description = description,
-            priority = priority,
-            tech_stack_by_category = tech_stack_by_category,
-            project_type = project_type
-        )
-        
-        tasks = result.get("tasks", [])
-        #print(f"Generated tasks: {tasks}")
-        
-        return {
-            "success": True,
-            "data": tasks,  
-            "tech_stack": tech_stack_recommendation,
-            "project_type": project_type,
-            "priority": priority
-        }
-        
+    except ClientDisconnected:
+        return Response(status_code=499)
     except Exception as e:
         print(f"Error in generate_tasks endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/replan-tasks")
+async def replan_tasks(request: Request):
+    """Regenerate the tasks of the categories touched by a list of tech stack edits"""
+    try:
+        data = await request.json()
+        print(f"Received replan request with {len(data.get('edits') or [])} edits")
+        plan, profile = await run_pipeline(request, "replan-tasks", data, build_replan, data)
+        return plan_response(plan, profile)
+
+    except ClientDisconnected:
+        return Response(status_code=499)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error in replan_tasks endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/plans/{plan_id}")
+async def get_plan(plan_id: str, request: Request):
+    """Fetch a stored plan; answers 304 when If-None-Match carries its current ETag"""
+    entry = plan_store.get(plan_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    body, etag = entry
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+@app.post("/api/generate-prompts")
+async def generate_prompts(request: Request):
+    """Generate prompts for the tasks a user opens, or prefetch them for the first few tasks of a plan"""
+    try:
+        data = await request.json()
+        tasks = data.get('tasks') or []
+        tech_stack = data.get('tech_stack')
+        task_ids = data.get('task_ids')
+
+        #a string would match ids by substring ("task-10" selecting task-1)
+        if task_ids is not None and not isinstance(task_ids, list):
+            raise ValueError("task_ids must be a list of task ids")
+        if task_ids is not None:
+            #an explicit empty list asks for nothing, not for a prefetch
+            selected = [task for task in tasks if task.get('id') in task_ids]
+        else:
+            prefetch = data.get('prefetch', os.getenv("PROMPT_PREFETCH_COUNT", "3"))
+            try:
+                prefetch = int(prefetch)
+            except (TypeError, ValueError):
+                raise ValueError(f"prefetch must be a number of tasks, got {prefetch!r}")
+            if prefetch < 0:
+                raise ValueError(f"prefetch must not be negative, got {prefetch}")
+            #each prefetched task is an LLM call, so only ever the first few
+            selected = tasks[:min(prefetch, int(os.getenv("PROMPT_PREFETCH_MAX", "10")))]
+        print(f"Generating prompts for {len(selected)} of {len(tasks)} tasks")
+
+        def run():
+            PromptGenerationCrew = load_prompt_crew()
+            #prefetching is speculative, so it yields to users waiting on a plan or an opened task
+            with priority(INTERACTIVE if task_ids is not None else BATCH):
+                return PromptGenerationCrew().generate_prompts(selected, tech_stack)
+
+        result, _ = await run_pipeline(request, "generate-prompts", data, run)
+        return {"success": True, **result}
+
+    except ClientDisconnected:
+        return Response(status_code=499)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error in generate_prompts endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/debug/hotspots")
+async def hotspots(request: Request, format: str = "json", top: int = 30):
+    """Hot spots aggregated by the always-on sampler (PROFILE_SAMPLING=true); needs the PROFILE_TOKEN"""
+    if not is_trusted(request.headers.get("x-profile")):
+        raise HTTPException(status_code=403, detail="Profiling is restricted to trusted callers")
+    if format == "collapsed":
+        return PlainTextResponse(hotspot_sampler.collapsed())
+    return hotspot_sampler.hotspots(top)
@@ -0,0 +1,204 @@
+"""
+Adaptive concurrency limit for outbound LLM calls, shared by every crew in the worker process.
+
+The limit follows AIMD: it grows by 1/limit per call that came back healthy, and is cut by
+LLM_LIMIT_BACKOFF when a call is rate limited, times out or is answered with a 5xx, or when the
+route's recent latency exceeds LLM_LIMIT_LATENCY_TOLERANCE times its long-run average. Waiting calls are
+admitted interactive first; batch work (prefetching, background warming) may hold at most
+LLM_LIMIT_BATCH_SHARE of the limit so a user's request always finds a slot soon.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+import os
+import threading
+import time
+from .cancellation import check_cancelled
+from .metrics import LatencyStats
+from .profiling import stage
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+_PRIORITY_ORDER = {INTERACTIVE: 0, BATCH: 1}
+
+_current_priority: ContextVar[str] = ContextVar("llm_priority", default=INTERACTIVE)
+
+@contextmanager
+def priority(level: str):
+    """Run the block's LLM calls at `level` (INTERACTIVE or BATCH)."""
+    if level not in _PRIORITY_ORDER:
+        raise ValueError(f"Unknown priority: {level}")
+    token = _current_priority.set(level)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+class CallBudget:
+    """Token bucket allowing `per_minute` LLM calls on average; take() blocks until a call may go."""
+
+    def __init__(self, per_minute: float, burst: float = 1):
+        self.per_minute = max(per_minute, 0.01)
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.per_minute / 60)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * 60 / self.per_minute
+            time.sleep(wait)
+
+_current_budget: ContextVar[Optional[CallBudget]] = ContextVar("llm_budget", default=None)
+
+@contextmanager
+def call_budget(budget: CallBudget):
+    """Charge the block's LLM calls to `budget`, e.g. to keep background work within its share of the rate limit."""
+    token = _current_budget.set(budget)
+    try:
+        yield
+    finally:
+        _current_budget.reset(token)
+
+OVERLOAD_STATUS_CODES = {429, 500, 502, 503, 504}
+OVERLOAD_MARKERS = ("429", "ratelimit", "rate limit", "timeout", "timed out", "resource_exhausted", "unavailable", "overloaded")
+
+def is_overload(error: BaseException) -> bool:
+    """Whether a failed call says the provider is overloaded, as opposed to e.g. a bad request."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status in OVERLOAD_STATUS_CODES:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in OVERLOAD_MARKERS)
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial: float = 8,
+        minimum: float = 1,
+        maximum: float = 64,
+        backoff: float = 0.7,
+        latency_tolerance: float = 1.5,
+        batch_share: float = 0.5
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.batch_share = batch_share
+        self.in_flight = {INTERACTIVE: 0, BATCH: 0}
+        self.increases = 0
+        self.decreases = 0
+        self.wait_stats = {INTERACTIVE: LatencyStats(), BATCH: LatencyStats()}
+        self._latencies: Dict[str, tuple] = {}
+        self._waiting: list = []
+        self._sequence = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def _can_start(self, ticket: tuple) -> bool:
+        if min(self._waiting) != ticket:
+            return False
+        if sum(self.in_flight.values()) >= int(self.limit):
+            return False
+        if ticket[0] == _PRIORITY_ORDER[BATCH]:
+            return self.in_flight[BATCH] < max(1, int(self.limit * self.batch_share))
+        return True
+
+    def acquire(self, level: str) -> float:
+        """Block until a call at `level` may start; returns the seconds spent waiting."""
+        started = time.perf_counter()
+        with self._condition:
+            self._sequence += 1
+            ticket = (_PRIORITY_ORDER[level], self._sequence)
+            self._waiting.append(ticket)
+            try:
+                while not self._can_start(ticket):
+                    #wake up now and then so a cancelled request leaves the queue
+                    self._condition.wait(timeout=0.5)
+                    check_cancelled()
+            finally:
+                self._waiting.remove(ticket)
+                #the next waiter may be able to start as well
+                self._condition.notify_all()
+            self.in_flight[level] += 1
+        waited = time.perf_counter() - started
+        self.wait_stats[level].record(waited, True)
+        return waited
+
+    def release(self, level: str, route: str, latency: Optional[float], overloaded: bool = False) -> None:
+        """Free the slot and adapt the limit: `latency` of a completed call, or `overloaded` for a failed one."""
+        with self._condition:
+            busy = sum(self.in_flight.values())
+            self.in_flight[level] -= 1
+            if overloaded or (latency is not None and self._too_slow(route, latency)):
+                self._decrease()
+            elif latency is not None and busy >= self.limit / 2:
+                #only grow a limit that is actually being used, so an idle worker cannot flood the provider later
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.increases += 1
+            self._condition.notify_all()
+
+    def _too_slow(self, route: str, latency: float) -> bool:
+        #gradient signal: the route's recent latency against its long-run average
+        short, long = self._latencies.get(route, (latency, latency))
+        short += (latency - short) * 0.2
+        long += (latency - long) * 0.02
+        self._latencies[route] = (short, long)
+        return short > long * self.latency_tolerance
+
+    def _decrease(self) -> None:
+        #calls that were already in flight report the same congestion; cut once per round trip
+        now = time.monotonic()
+        if now - self._last_decrease < min((long for _, long in self._latencies.values()), default=1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        self.decreases += 1
+
+    @contextmanager
+    def slot(self, route: str):
+        """Hold a slot for one call at the current priority, adapting the limit from how it went."""
+        level = _current_priority.get()
+        budget = _current_budget.get()
+        with stage("llm_queue"):
+            if budget is not None:
+                budget.take()
+            self.acquire(level)
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.release(level, route, None, overloaded=is_overload(e))
+            raise
+        self.release(level, route, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._condition:
+            queued = {level: sum(1 for ticket in self._waiting if ticket[0] == order) for level, order in _PRIORITY_ORDER.items()}
+            state = {
+                "limit": round(self.limit, 2),
+                "in_flight": dict(self.in_flight),
+                "queue_depth": queued,
+                "increases": self.increases,
+                "decreases": self.decreases,
+            }
+        state["wait_seconds"] = {level: stats.snapshot() for level, stats in self.wait_stats.items()}
+        return state
+
+llm_limiter = AdaptiveLimiter(
+    initial=float(os.getenv("LLM_LIMIT_INITIAL", "8")),
+    minimum=float(os.getenv("LLM_LIMIT_MIN", "1")),
+    maximum=float(os.getenv("LLM_LIMIT_MAX", "64")),
+    backoff=float(os.getenv("LLM_LIMIT_BACKOFF", "0.7")),
+    latency_tolerance=float(os.getenv("LLM_LIMIT_LATENCY_TOLERANCE", "1.5")),
+    batch_share=float(os.getenv("LLM_LIMIT_BATCH_SHARE", "0.5"))
+)
@@ -0,0 +1,129 @@
+from crewai import BaseLLM, LLM
+from crewai.llms.base_llm import call_stop_override
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+import json
+import os
+import time
+from .cancellation import check_cancelled, count_llm_call
+from .limiter import llm_limiter
+from .metrics import route_stats
+from .profiling import stage
+
+DEFAULT_MODEL = "gemini/gemini-2.0-flash"
+
+class ManagedLLM(BaseLLM):
+    """
+    Wraps the provider LLM handed to the agents so every outbound call goes through one place:
+    cancellation, the worker's adaptive concurrency limit, the "llm_call" stage of a profiled request
+    and its route's stats.
+    """
+
+    def __init__(self, inner: BaseLLM, route: str = "default"):
+        super().__init__(model=inner.model, temperature=getattr(inner, "temperature", None))
+        self.inner = inner
+        self.route = route
+
+    def call(self, messages, *args, **kwargs):
+        #nobody is waiting for a cancelled request's answer, so its remaining calls are never made
+        check_cancelled()
+        stats = route_stats(self.route, self.inner.model)
+        with llm_limiter.slot(self.route):
+            check_cancelled()
+            count_llm_call()
+            started = time.perf_counter()
+            ok = False
+            try:
+                #agent executors override the stop words of the LLM they were given (us) for the call's scope;
+                #kwargs such as response_model (JSON mode) pass straight through
+                with call_stop_override(self.inner, list(self.stop_sequences)), stage("llm_call"):
+                    result = self.inner.call(messages, *args, **kwargs)
+                ok = True
+                return result
+            finally:
+                stats.record(time.perf_counter() - started, ok)
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+def load_routes() -> Dict[str, Any]:
+    """
+    LLM_ROUTES: a JSON object (inline, or the path of a .json file) mapping a route to a model,
+    e.g. {"default": "gemini/gemini-2.0-flash", "category.backend": {"model": "gemini/gemini-2.5-pro",
+    "temperature": 0.5}, "category": "gemini/gemini-2.0-flash-lite", "prompts": "local/qwen2.5:14b"}
+    """
+    config = os.getenv("LLM_ROUTES", "").strip()
+    if not config:
+        return {}
+    if not config.startswith("{"):
+        config = Path(config).read_text()
+    routes = json.loads(config)
+    if not isinstance(routes, dict):
+        raise ValueError("LLM_ROUTES must be a JSON object")
+    return routes
+
+def resolve_route(route: str, routes: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """The model spec of `route`, trying e.g. "category.backend", then "category", then "default"."""
+    routes = load_routes() if routes is None else routes
+    parts = route.split(".")
+    for name in [".".join(parts[:i]) for i in range(len(parts), 0, -1)] + ["default"]:
+        if name in routes:
+            spec = routes[name]
+            return {"model": spec} if isinstance(spec, str) else dict(spec)
+    return {"model": DEFAULT_MODEL}
+
+@lru_cache(maxsize=32)
+def _provider_llm(model: str, temperature: Optional[float], api_base: Optional[str], api_key: Optional[str]) -> BaseLLM:
+    #provider clients are safe to share between crews; stop words are set per call, not on the instance
+    if model.startswith("fake/") or os.getenv("LLM_BACKEND", "gemini").lower() == "fake":
+        from .fake_llm import FakeLLM
+        return FakeLLM(temperature=temperature)
+
+    if model.startswith("local/"):
+        #any OpenAI-compatible server: vLLM, Ollama, llama.cpp, LM Studio
+        return LLM(
+            model=f"openai/{model[len('local/'):]}",
+            temperature=temperature,
+            base_url=api_base or os.getenv("LOCAL_LLM_API_BASE", "http://localhost:11434/v1"),
+            api_key=api_key or os.getenv("LOCAL_LLM_API_KEY", "local")
+        )
+
+    if model.startswith("gemini/"):
+        api_base = api_base or os.getenv("GEMINI_API_BASE")
+        return LLM(
+            model=model,
+            temperature=temperature,
+            api_key=api_key or os.getenv("GEMINI_API_KEY"),
+            **({"client_params": {"http_options": {"base_url": api_base}}} if api_base else {})
+        )
+
+    #other crewai providers read their own credentials from the environment
+    return LLM(model=model, temperature=temperature, **({"api_key": api_key} if api_key else {}))
+
+def create_llm(temperature: float = 0.7, route: str = "default") -> ManagedLLM:
+    """
+    Build the LLM for one stage of the crews, as routed by LLM_ROUTES (see load_routes).
+
+    Set LLM_BACKEND=fake to run the whole pipeline offline against canned
+    responses (see app/fake_llm.py), e.g. for benchmarks. GEMINI_API_BASE points
+    the Gemini client at another Gemini-compatible server, e.g. the load-test fakes;
+    models named "local/<name>" are served by the OpenAI-compatible LOCAL_LLM_API_BASE.
+    """
+    spec = resolve_route(route)
+    api_key_env = spec.get("api_key_env")
+    return ManagedLLM(
+        _provider_llm(
+            spec.get("model", DEFAULT_MODEL),
+            spec.get("temperature", temperature),
+            spec.get("api_base"),
+            os.getenv(api_key_env) if api_key_env else None
+        ),
+        route=route
+    )
@@ -0,0 +1,66 @@
+"""
+In-process metrics for outbound LLM calls, served by GET /metrics.
+
+Kept free of crewai imports so the endpoint works before the crews are warm.
+"""
+from collections import deque
+from typing import Any, Dict, Optional
+import threading
+
+class LatencyStats:
+    """Call and error counts, plus latency percentiles over the most recent `window` calls."""
+
+    def __init__(self, window: int = 1000):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.total_seconds += seconds
+            self.recent.append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self.recent)
+            calls, errors, total_seconds = self.calls, self.errors, self.total_seconds
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(fraction * len(recent)))], 4)
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "error_rate": round(errors / calls, 4) if calls else 0.0,
+            "mean_seconds": round(total_seconds / calls, 4) if calls else None,
+            "p50_seconds": percentile(0.50),
+            "p90_seconds": percentile(0.90),
+            "p99_seconds": percentile(0.99),
+        }
+
+_route_stats: Dict[tuple, LatencyStats] = {}
+_route_stats_lock = threading.Lock()
+
+def route_stats(route: str, model: str) -> LatencyStats:
+    """The stats of one (route, model) pair, so a config change starts a fresh series."""
+    key = (route, model)
+    with _route_stats_lock:
+        stats = _route_stats.get(key)
+        if stats is None:
+            stats = _route_stats[key] = LatencyStats()
+        return stats
+
+def llm_route_metrics() -> Dict[str, Dict[str, Any]]:
+    with _route_stats_lock:
+        items = list(_route_stats.items())
+    metrics = {}
+    for (route, model), stats in sorted(items):
+        metrics.setdefault(route, {})[model] = stats.snapshot()
+    return metrics
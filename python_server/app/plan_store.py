@@ -0,0 +1,109 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from .cache import TTLCache
+
+def serialize_plan(plan: Dict[str, Any]) -> Tuple[bytes, str]:
+    """
+    Serialize a plan once into compact, key-sorted JSON and derive its ETag from the bytes,
+    so the same plan gets the same ETag whether it was just generated or read back from a store.
+    """
+    body = json.dumps(plan, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return body, compute_etag(body)
+
+def compute_etag(body: bytes) -> str:
+    #weak ETag: the representation stays equivalent when it is gzip/br encoded on the way out
+    return f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+class PlanStore:
+    """
+    Serialized plans by id. Always kept in a per-worker LRU; when PLAN_STORE_DIR is set they are
+    also written there, so any worker on the host can serve a plan another worker generated.
+    Files older than `ttl` are no longer served and are pruned now and then on save.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 512, ttl: float = 86400,
+                 prune_interval: float = 600):
+        self.memory = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self.directory = Path(directory) if directory else None
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def save(self, plan: Dict[str, Any]) -> Tuple[str, bytes, str]:
+        """Assign the plan an id, store it and return (plan_id, body, etag)."""
+        plan_id = uuid.uuid4().hex
+        body, etag = serialize_plan({**plan, "plan_id": plan_id})
+        self.memory.set(plan_id, (body, etag))
+        if self.directory:
+            tmp_path = self.directory / f".{plan_id}.tmp"
+            tmp_path.write_bytes(body)
+            tmp_path.replace(self.directory / f"{plan_id}.json")
+            if time.time() - self._last_prune >= self.prune_interval:
+                self.prune()
+        return plan_id, body, etag
+
+    def prune(self) -> int:
+        """Delete stored plan files past the TTL; returns how many were removed."""
+        self._last_prune = time.time()
+        expired_before = self._last_prune - self.ttl
+        removed = 0
+        #.tmp files are half-written plans left behind by a worker that died mid-save
+        for path in list(self.directory.glob("*.json")) + list(self.directory.glob(".*.tmp")):
+            try:
+                if path.stat().st_mtime < expired_before:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                #another worker pruned it first
+                continue
+        return removed
+
+    def get(self, plan_id: str) -> Optional[Tuple[bytes, str]]:
+        if not re.fullmatch(r"[0-9a-f]{32}", plan_id):
+            return None
+
+        entry = self.memory.get(plan_id)
+        if entry is not None:
+            return entry
+
+        if self.directory:
+            path = self.directory / f"{plan_id}.json"
+            try:
+                if path.stat().st_mtime < time.time() - self.ttl:
+                    return None
+                body = path.read_bytes()
+            except FileNotFoundError:
+                return None
+            entry = (body, compute_etag(body))
+            self.memory.set(plan_id, entry)
+            return entry
+        return None
+
+plan_store = PlanStore(
+    directory=os.getenv("PLAN_STORE_DIR"),
+    max_entries=int(os.getenv("PLAN_STORE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("PLAN_STORE_TTL_SECONDS", "86400")),
+    prune_interval=float(os.getenv("PLAN_STORE_PRUNE_SECONDS", "600"))
+)
@@ -0,0 +1,160 @@
+"""
+Background warmer for popular project profiles.
+
+Most plans fall into a few (project type, priority, experience level) profiles. For the top
+WARMER_TOP_N profiles seen in the last WARMER_WINDOW_HOURS, the warmer precomputes research
+findings, a tech stack and per-category task templates, at startup and every
+WARMER_INTERVAL_SECONDS. Plans for a warm profile get the warm findings as extra context for
+curation (or, with WARMER_SKIP_RESEARCH=true, instead of their own research), and fall back to
+the warm stack and templates for categories that could not be generated. Warming runs
+at batch priority and within WARMER_BUDGET_SHARE of LLM_RATE_LIMIT_RPM, split across the
+WEB_CONCURRENCY workers (each worker warms its own caches).
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+from .cache import TTLCache
+from .limiter import BATCH, CallBudget, call_budget, priority
+from .warmup import load_crews, mark_ready, warmup_pending
+
+Profile = Tuple[str, str, str]
+
+def profile_key(project_type: str, priority_text: str, experience_level: str) -> Profile:
+    """Reduce free-text priorities ("Speed (Get a working MVP fast)") and experience levels to their first word."""
+    def first_word(text: str) -> str:
+        return (text or "").replace("-", " ").replace("(", " ").split(" ", 1)[0].strip() or "Unspecified"
+    return (project_type or "Web Application", first_word(priority_text), first_word(experience_level))
+
+class TrafficCounter:
+    """Profiles seen per hour, over a sliding window of `window_hours`."""
+
+    def __init__(self, window_hours: int = 24):
+        self.window_hours = window_hours
+        self._buckets: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+
+    def record(self, profile: Profile) -> None:
+        hour = int(time.time() // 3600)
+        with self._lock:
+            self._buckets.setdefault(hour, Counter())[profile] += 1
+            for old in [bucket for bucket in self._buckets if bucket <= hour - self.window_hours]:
+                del self._buckets[old]
+
+    def top(self, n: int) -> List[Profile]:
+        oldest = int(time.time() // 3600) - self.window_hours
+        total = Counter()
+        with self._lock:
+            for hour, counts in self._buckets.items():
+                if hour > oldest:
+                    total.update(counts)
+        return [profile for profile, _ in total.most_common(n)]
+
+class ProfileWarmer:
+    def __init__(self, top_n: int = 5, interval: float = 3600, window_hours: int = 24, calls_per_minute: float = 10,
+                 seed_profiles: Optional[List[Profile]] = None):
+        self.top_n = top_n
+        self.interval = interval
+        self.traffic = TrafficCounter(window_hours)
+        self.budget = CallBudget(calls_per_minute)
+        self.seed_profiles = seed_profiles or []
+        #warm entries outlive one refresh so a slow refresh never leaves a profile cold
+        self._warm = TTLCache(max_entries=max(1, top_n) * 4, ttl=interval * 3)
+        self.refreshes = 0
+        self.last_refresh_seconds: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def record(self, profile: Profile) -> None:
+        self.traffic.record(profile)
+
+    def warm_entry(self, profile: Profile) -> Dict[str, Any]:
+        """Research findings, tech stack and task templates of a warm profile; empty when cold."""
+        return self._warm.get(profile) or {}
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profile-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        #let the startup warmup build the crews first, if there is one; otherwise we build them ourselves
+        while warmup_pending() and not self._stop.wait(1):
+            pass
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def refresh(self) -> None:
+        profiles = self.traffic.top(self.top_n) or self.seed_profiles[:self.top_n]
+        started = time.perf_counter()
+        with priority(BATCH), call_budget(self.budget):
+            for profile in profiles:
+                if self._stop.is_set():
+                    return
+                try:
+                    self._warm.set(profile, self.warm_profile(profile))
+                except Exception as e:
+                    print(f"Warming profile {profile} failed: {str(e)}")
+        self.refreshes += 1
+        self.last_refresh_seconds = round(time.perf_counter() - started, 3)
+        print(f"Warmed {len(profiles)} project profiles in {self.last_refresh_seconds}s")
+
+    def warm_profile(self, profile: Profile) -> Dict[str, Any]:
+        project_type, priority_text, experience_level = profile
+        description = f"A typical {project_type} project"
+        TechStackCuratorCrew, TaskGenerationCrew = load_crews()
+
+        curator = TechStackCuratorCrew(api_key=os.getenv("BRAVE_API_KEY"))
+        findings = curator.research(project_type=project_type, project_description=description)
+        tech_stack = curator.curate_tech_stack(
+            project_type=project_type,
+            priority=priority_text,
+            experience_level=experience_level,
+            project_description=description,
+            research_findings=findings,
+            skip_research=True
+        )
+        if "error" in tech_stack:
+            raise RuntimeError(tech_stack["error"])
+
+        crew = TaskGenerationCrew()
+        mark_ready()
+        categories = list(curator.CATEGORIES)
+        templates = crew.generate_category_tasks(
+            project_description=description,
+            priority=priority_text,
+            tech_stack_by_category={category: tech_stack.get(category, []) for category in categories},
+            project_type=project_type,
+            categories=categories
+        )
+        return {"research_findings": findings, "tech_stack": tech_stack, "task_templates": templates}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None,
+            "warm_profiles": len(self._warm),
+            "top_profiles": [list(profile) for profile in self.traffic.top(self.top_n)],
+            "refreshes": self.refreshes,
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "calls_per_minute": round(self.budget.per_minute, 2),
+        }
+
+def _seed_profiles() -> List[Profile]:
+    seeds = json.loads(os.getenv("WARMER_SEED_PROFILES", '[["Web Application", "Speed", "Beginner"]]'))
+    return [profile_key(*seed) for seed in seeds]
+
+profile_warmer = ProfileWarmer(
+    top_n=int(os.getenv("WARMER_TOP_N", "5")),
+    interval=float(os.getenv("WARMER_INTERVAL_SECONDS", "3600")),
+    window_hours=int(os.getenv("WARMER_WINDOW_HOURS", "24")),
+    #the warmer's share of the provider's rate limit, split across the workers that each run one
+    calls_per_minute=float(os.getenv("LLM_RATE_LIMIT_RPM", "1000")) * float(os.getenv("WARMER_BUDGET_SHARE", "0.05"))
+    / max(1, int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))),
+    seed_profiles=_seed_profiles()
+)
@@ -0,0 +1,179 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import cProfile
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:  # pyinstrument is optional; without it requests are profiled with cProfile
+    SamplingProfiler = None
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+#cProfile and pyinstrument both install the interpreter's profile hook, so only one can run at a time
+PROFILE_ENGINE = os.getenv("PROFILE_ENGINE", "pyinstrument" if SamplingProfiler else "cprofile")
+
+class RequestProfile:
+    """Wall-clock time per pipeline stage for one profiled request."""
+
+    def __init__(self, label: str):
+        self.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.label = label
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "count": 0})
+            entry["seconds"] += seconds
+            entry["count"] += 1
+
+    def breakdown(self, total_seconds: float) -> Dict[str, Any]:
+        waiting = sum(self.stages.get(name, {}).get("seconds", 0.0) for name in ("llm_call", "llm_queue", "web_search"))
+        parsing = self.stages.get("json_parsing", {}).get("seconds", 0.0)
+        return {
+            "profile_id": self.profile_id,
+            "label": self.label,
+            "total_seconds": round(total_seconds, 4),
+            "stages": {name: {"seconds": round(entry["seconds"], 4), "count": entry["count"]} for name, entry in self.stages.items()},
+            #whatever is not network wait or JSON cleaning is crewai orchestration and our own code
+            "orchestration_seconds": round(max(0.0, total_seconds - waiting - parsing), 4),
+        }
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+@contextmanager
+def stage(name: str):
+    """Time a block as `name` in the current request's profile; a no-op for unprofiled requests."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+def is_trusted(token: Optional[str]) -> bool:
+    expected = os.getenv("PROFILE_TOKEN")
+    #compare bytes: compare_digest raises TypeError for non-ASCII str, which would turn a bad token into a 500
+    return bool(expected and token and hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")))
+
+def requested_profile(headers, label: str) -> Optional[RequestProfile]:
+    """
+    A RequestProfile if the caller asked for one with the PROFILE_TOKEN in the X-Profile header.
+    Never a query parameter: URLs end up in the access log, and the token with them.
+    """
+    token = headers.get("x-profile")
+    if not token:
+        return None
+    if not is_trusted(token):
+        print("Ignoring profiling request without a valid PROFILE_TOKEN")
+        return None
+    return RequestProfile(label)
+
+def run_profiled(profile: Optional[RequestProfile], fn: Callable, *args, **kwargs):
+    """
+    Run fn, and if `profile` is set, profile it in this thread. Writes the stage breakdown (.json)
+    and either a pyinstrument flamegraph (.html) or a cProfile dump (.prof) to PROFILE_DIR.
+    """
+    if profile is None:
+        return fn(*args, **kwargs)
+
+    token = _current_profile.set(profile)
+    sampler = SamplingProfiler(async_mode="disabled") if PROFILE_ENGINE == "pyinstrument" and SamplingProfiler else None
+    cpu_profiler = None if sampler else cProfile.Profile()
+    started = time.perf_counter()
+    if sampler:
+        sampler.start()
+    else:
+        cpu_profiler.enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        if sampler:
+            sampler.stop()
+        else:
+            cpu_profiler.disable()
+        total_seconds = time.perf_counter() - started
+        _current_profile.reset(token)
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        base_path = PROFILE_DIR / profile.profile_id
+        if sampler:
+            Path(f"{base_path}.html").write_text(sampler.output_html())
+        else:
+            cpu_profiler.dump_stats(f"{base_path}.prof")
+        Path(f"{base_path}.json").write_text(json.dumps(profile.breakdown(total_seconds), indent=2))
+        print(f"Wrote request profile {base_path}.*")
+
+IDLE_FRAMES = {"wait", "_wait_for_tstate_lock", "select", "poll", "accept", "_worker"}
+
+class HotspotSampler:
+    """
+    Always-on, low-overhead sampler: every `interval` seconds it records the stack of each busy thread.
+    Aggregates leaf functions and collapsed stacks (flamegraph.pl / speedscope format) across all requests.
+    """
+
+    def __init__(self, interval: float = 0.05, max_depth: int = 40, max_stacks: int = 5000):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.samples = 0
+        self.leaves: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="hotspot-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                #idle threads parked in the thread pool or selector are not interesting
+                if not stack or stack[0].split(" ")[0] in IDLE_FRAMES:
+                    continue
+                with self._lock:
+                    self.samples += 1
+                    self.leaves[stack[0]] += 1
+                    collapsed = ";".join(reversed(stack))
+                    if collapsed in self.stacks or len(self.stacks) < self.max_stacks:
+                        self.stacks[collapsed] += 1
+
+    def hotspots(self, top: int = 30) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "samples": self.samples,
+                "interval_seconds": self.interval,
+                "top": [{"frame": frame, "samples": count} for frame, count in self.leaves.most_common(top)],
+            }
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+hotspot_sampler = HotspotSampler(interval=float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "50")) / 1000)
@@ -1,112 +1,188 @@
-from crewai import Agent, Task, Crew, LLM
+from crewai import Agent, Task, Crew
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
+import ast
+import contextvars
+import copy
 import json
-from typing import List, Dict, Any
+import os
+import re
+from typing import List, Dict, Any, Optional, Union
+from .cache import TTLCache, normalize_text, stable_hash
+from .llm import create_llm
+from .profiling import stage
+from .schemas import TaskPromptsOutput, parse_output, response_model
+
+#prompts depend only on the task text and its technologies, so they are shared across plans and users
+_prompt_cache = TTLCache(
+    max_entries=int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "4096")),
+    ttl=float(os.getenv("PROMPT_CACHE_TTL_SECONDS", "604800"))
+)
 
 class PromptGenerationCrew:
-    def __init__(self):
-        self.llm = LLM(
-            model="gemini/gemini-2.0-flash",
-            temperature=0.7
-        )
-    
-    def generate_prompts(self, tasks: List[Dict[str, Any]], tech_stack: List[str] = None) -> Dict[str, Any]:
+    def __init__(self, max_parallel: Optional[int] = None):
+        self.llm = create_llm(temperature=0.7, route="prompts")
+        self.max_parallel = max_parallel or int(os.getenv("PROMPT_MAX_PARALLEL", "3"))
+
+    def generate_prompts(self, tasks: List[Dict[str, Any]], tech_stack: Union[Dict[str, Any], List[str]] = None) -> Dict[str, Any]:
         """
         Generate detailed prompts for each task that users can use with their own LLM
         to learn more about how to implement the feature.
-        
+
+        Each task is a separate, cached LLM call; at most `max_parallel` run at once.
+
         Args:
             tasks: List of tasks with their subtasks
-            tech_stack: Optional list of technologies to use in the project
-            
+            tech_stack: Optional tech stack (by category) or list of technologies to use in the project
+
         Returns:
             Dictionary with tasks and their corresponding prompts
         """
-        try:
-            agent = Agent(
-                role='Prompt Engineer',
-                goal='Create detailed, educational prompts for software development tasks',
-                backstory=dedent("""
-                    You are an expert at creating educational prompts for software development.
-                    You understand how to break down complex tasks into learnable components.
-                    You create prompts that help developers understand not just what to do, but why and how.
-                """),
-                llm=self.llm,
-                verbose=True
-            )
-            
-            # Convert tasks to a string representation for the prompt
-            tasks_str = json.dumps(tasks, indent=2)
-            tech_stack_str = ", ".join(tech_stack) if tech_stack else "Not specified"
-            
-            task_description = dedent(f"""
-                Create detailed, educational prompts for the following software development tasks:
-                
-                {tasks_str}
-                
-                Technologies to consider: {tech_stack_str}
-                
-                For each task and subtask, create a detailed prompt that:
-                1. Explains the concept behind the task
-                2. Provides context on why this task is important
-                3. Includes specific technical details and best practices
-                4. Suggests resources for learning more
-                5. Provides examples or code snippets where appropriate
-                
-                Format the response as a JSON object with this structure:
-                {{
-                    "taskPrompts": [
-                        {{
-                            "taskId": "task-1",
-                            "prompt": "Detailed prompt for the main task",
-                            "subtaskPrompts": [
-                                {{
-                                    "subtaskId": "subtask-1-1",
-                                    "prompt": "Detailed prompt for the subtask"
-                                }}
-                            ]
-                        }}
-                    ]
-                }}
-                
-                Make each prompt comprehensive enough that a developer could copy and paste it into their own LLM
-                to get detailed guidance on how to implement the feature.
-            """)
-            
-            task = Task(
+        if not tasks:
+            return {"taskPrompts": []}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(tasks))) as pool:
+            #each worker thread gets its own copy of the request's context
+            futures = [
+                pool.submit(contextvars.copy_context().run, self.generate_task_prompt, task, tech_stack)
+                for task in tasks
+            ]
+            task_prompts = [future.result() for future in futures]
+
+        errors = [prompt.get("error") for prompt in task_prompts if prompt.get("error")]
+        result = {"taskPrompts": [prompt for prompt in task_prompts if not prompt.get("error")]}
+        if errors:
+            result["errors"] = errors
+        return result
+
+    def generate_task_prompt(self, task: Dict[str, Any], tech_stack: Union[Dict[str, Any], List[str]] = None) -> Dict[str, Any]:
+        """Generate (or fetch from cache) the prompts for a single task and its subtasks."""
+        technologies = self._technologies_for(task, tech_stack)
+        subtasks = [subtask for subtask in task.get("subtasks", []) if isinstance(subtask, dict)]
+        cache_key = stable_hash({
+            "task": normalize_text(task.get("text")),
+            "subtasks": [normalize_text(subtask.get("text")) for subtask in subtasks],
+            "technologies": sorted(normalize_text(tech) for tech in technologies),
+        })
+
+        prompts = _prompt_cache.get(cache_key)
+        if prompts is None:
+            try:
+                prompts = self._run_prompt_crew(task, subtasks, technologies)
+            except Exception as e:
+                print(f"Error generating prompts for {task.get('id')}: {str(e)}")
+                return {"taskId": task.get("id"), "error": str(e)}
+            _prompt_cache.set(cache_key, prompts)
+        prompts = copy.deepcopy(prompts)
+
+        #prompts are cached by text, so attach this plan's ids on the way out
+        subtask_prompts = prompts.get("subtaskPrompts", [])
+        return {
+            "taskId": task.get("id"),
+            "prompt": prompts.get("prompt", ""),
+            "subtaskPrompts": [
+                {"subtaskId": subtask.get("id"), "prompt": subtask_prompts[i] if i < len(subtask_prompts) else ""}
+                for i, subtask in enumerate(subtasks)
+            ]
+        }
+
+    def _technologies_for(self, task: Dict[str, Any], tech_stack: Union[Dict[str, Any], List[str], None]) -> List[str]:
+        if not tech_stack:
+            return []
+        if isinstance(tech_stack, dict):
+            #only the technologies of the task's own category are relevant to its prompt
+            items = tech_stack.get(task.get("category"), [])
+            return [item.get("name") for item in items if isinstance(item, dict) and item.get("name")]
+        return [str(tech) for tech in tech_stack]
+
+    def _run_prompt_crew(self, task: Dict[str, Any], subtasks: List[Dict[str, Any]], technologies: List[str]) -> Dict[str, Any]:
+        agent = Agent(
+            role='Prompt Engineer',
+            goal='Create detailed, educational prompts for software development tasks',
+            backstory=dedent("""
+                You are an expert at creating educational prompts for software development.
+                You understand how to break down complex tasks into learnable components.
+                You create prompts that help developers understand not just what to do, but why and how.
+            """),
+            llm=self.llm,
+            verbose=True
+        )
+
+        subtasks_str = "\n".join(f"{i+1}. {subtask.get('text', '')}" for i, subtask in enumerate(subtasks)) or "None"
+        tech_stack_str = ", ".join(technologies) if technologies else "Not specified"
+
+        task_description = dedent(f"""
+            Create a detailed, educational prompt for the following software development task and each of its subtasks.
+
+            TASK:
+            {task.get('text', '')}
+
+            SUBTASKS:
+            {subtasks_str}
+
+            Technologies to consider: {tech_stack_str}
+
+            Each prompt should:
+            1. Explain the concept behind the task
+            2. Provide context on why this task is important
+            3. Include specific technical details and best practices
+            4. Suggest resources for learning more
+            5. Provide examples or code snippets where appropriate
+
+            Format the response as a JSON object with this structure, with one subtask prompt per subtask, in order:
+            {{
+                "prompt": "Detailed prompt for the main task",
+                "subtaskPrompts": ["Detailed prompt for subtask 1", "Detailed prompt for subtask 2"]
+            }}
+
+            Make each prompt comprehensive enough that a developer could copy and paste it into their own LLM
+            to get detailed guidance on how to implement the feature.
+        """)
+
+        crew = Crew(
+            agents=[agent],
+            tasks=[Task(
                 description=task_description,
-                expected_output="A JSON object containing detailed prompts for each task and subtask",
-                agent=agent
-            )
-            
-            crew = Crew(
-                agents=[agent],
-                tasks=[task],
-                verbose=True
-            )
-            
+                expected_output="A JSON object containing a detailed prompt for the task and each subtask",
+                agent=agent,
+                response_model=response_model(TaskPromptsOutput)
+            )],
+            verbose=True
+        )
+
+        with stage("prompt_crew"):
             result = crew.kickoff()
-            print(f"Raw result from PromptGenerationCrew: {result}")
-            
-            result_str = str(result)
+        with stage("json_parsing"):
+            prompts_data = parse_output(str(result), TaskPromptsOutput, self._parse_prompts)
+        if not isinstance(prompts_data.get("subtaskPrompts", []), list):
+            prompts_data["subtaskPrompts"] = []
+        prompts_data["subtaskPrompts"] = [
+            prompt.get("prompt", "") if isinstance(prompt, dict) else str(prompt)
+            for prompt in prompts_data.get("subtaskPrompts", [])
+        ]
+        return prompts_data
+
+    def _parse_prompts(self, result_str: str) -> Dict[str, Any]:
+        """Parse the agent's JSON answer without ever evaluating it as code."""
+        candidates = [result_str]
+        fenced = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```', result_str)
+        if fenced:
+            candidates.append(fenced.group(1))
+        braces = re.search(r'(\{[\s\S]*\})', result_str)
+        if braces:
+            candidates.append(braces.group(1))
+
+        for candidate in candidates:
             try:
-                prompts_data = json.loads(result_str)
+                parsed = json.loads(candidate)
             except json.JSONDecodeError:
-                import re
-                json_match = re.search(r'(\{[\s\S]*\})', result_str)
-                if json_match:
-                    try:
-                        prompts_data = json.loads(json_match.group(1))
-                    except json.JSONDecodeError:
-                        prompts_data = eval(json_match.group(1))
-                else:
-                    raise ValueError("Could not extract valid JSON from result")
-            
-            return prompts_data
-            
-        except Exception as e:
-            print(f"Error generating prompts: {str(e)}")
-            return {
-                "error": str(e),
-                "taskPrompts": []
-            } 
\ No newline at end of file
+                #models sometimes answer with a Python-style dict (single quotes, True/False);
+                #literal_eval only accepts literals, unlike the eval this replaces
+                try:
+                    parsed = ast.literal_eval(candidate)
+                except (ValueError, SyntaxError, MemoryError, RecursionError):
+                    continue
+            if isinstance(parsed, dict):
+                return parsed
+
+        raise ValueError("Could not extract valid JSON from result")
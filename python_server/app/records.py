@@ -0,0 +1,90 @@
+"""
+Compact records for the technologies and tasks that move through the pipeline.
+
+Answers are turned into records once, when they are parsed, and stay records through
+validation, repair, caching, warming and merging; they become dicts only at the
+response boundary (stack_to_dict, tasks_to_dicts). Records are frozen, so the
+category cache and the profile warmer hand out the same instances instead of deep
+copies. Task ids depend on a task's position in the plan, so they are assigned when
+the plan is serialized rather than stored.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+@dataclass(frozen=True, slots=True)
+class TechnologyRecord:
+    name: str
+    description: str
+    docLink: str
+
+    @classmethod
+    def from_item(cls, item: Any) -> Optional["TechnologyRecord"]:
+        """A record for an answer's technology entry; None unless name, description and docLink are all non-empty strings."""
+        if isinstance(item, cls):
+            return item
+        if not isinstance(item, dict):
+            return None
+        values = [item.get(key) for key in ("name", "description", "docLink")]
+        if not all(isinstance(value, str) and value.strip() for value in values):
+            return None
+        return cls(*values)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"name": self.name, "description": self.description, "docLink": self.docLink}
+
+@dataclass(frozen=True, slots=True)
+class SubtaskRecord:
+    text: str
+    completed: bool = False
+
+    def to_dict(self, task_number: int, number: int) -> Dict[str, Any]:
+        return {"id": f"subtask-{task_number}-{number}", "text": self.text, "completed": self.completed}
+
+@dataclass(frozen=True, slots=True)
+class TaskRecord:
+    text: str
+    category: str
+    completed: bool = False
+    subtasks: Tuple[SubtaskRecord, ...] = ()
+
+    @classmethod
+    def from_item(cls, item: Any) -> Optional["TaskRecord"]:
+        """A record for an answer's task entry, or None if it is not a task object."""
+        if isinstance(item, cls):
+            return item
+        if not isinstance(item, dict):
+            return None
+        subtasks = item.get("subtasks")
+        return cls(
+            text=str(item.get("text", "")),
+            category=item.get("category") or "unknown",
+            completed=bool(item.get("completed", False)),
+            subtasks=tuple(
+                SubtaskRecord(text=str(subtask.get("text", "")), completed=bool(subtask.get("completed", False)))
+                if isinstance(subtask, dict) else SubtaskRecord(text=str(subtask))
+                for subtask in (subtasks if isinstance(subtasks, list) else [])
+            )
+        )
+
+    def to_dict(self, number: int) -> Dict[str, Any]:
+        return {
+            "id": f"task-{number}",
+            "text": self.text,
+            "completed": self.completed,
+            "category": self.category,
+            "subtasks": [subtask.to_dict(number, j + 1) for j, subtask in enumerate(self.subtasks)],
+        }
+
+def tasks_from_items(items: Iterable[Any]) -> List[TaskRecord]:
+    return [task for task in map(TaskRecord.from_item, items or []) if task is not None]
+
+def tasks_to_dicts(tasks: Iterable[TaskRecord], first_number: int = 1) -> List[Dict[str, Any]]:
+    """The response form of a plan's tasks, numbered task-1, task-2, ... in order."""
+    return [task.to_dict(i) for i, task in enumerate(tasks, start=first_number)]
+
+def stack_to_dict(tech_stack: Dict[str, Any]) -> Dict[str, Any]:
+    """The response form of a tech stack whose categories hold TechnologyRecords."""
+    return {
+        key: [item.to_dict() if isinstance(item, TechnologyRecord) else item for item in value] if isinstance(value, list) else value
+        for key, value in tech_stack.items()
+    }
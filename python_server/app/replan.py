@@ -0,0 +1,108 @@
+import copy
+import re
+from typing import Any, Dict, List, Set, Tuple
+
+CATEGORIES = ["setup", "frontend", "backend", "testing", "deploy", "maintain"]
+
+def apply_stack_edits(tech_stack: Dict[str, Any], edits: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Set[str]]:
+    """
+    Apply edits of the form {"category", "remove": name, "add": {name, description, docLink}}
+    to a copy of `tech_stack`. Returns the new stack and the categories that actually changed.
+    """
+    if not isinstance(tech_stack or {}, dict):
+        raise ValueError("tech_stack must be an object of categories")
+    if not isinstance(edits, list):
+        raise ValueError("edits must be a list")
+    new_stack = copy.deepcopy(tech_stack or {})
+    changed = set()
+
+    for edit in edits:
+        if not isinstance(edit, dict):
+            raise ValueError(f"Each edit must be an object, got {edit!r}")
+        category = edit.get("category")
+        if category not in CATEGORIES:
+            raise ValueError(f"Unknown tech stack category: {category}")
+
+        items = new_stack.get(category)
+        if not isinstance(items, list):
+            items = []
+        before = copy.deepcopy(items)
+
+        remove = edit.get("remove")
+        if remove is not None and not isinstance(remove, str):
+            raise ValueError(f"Edit for {category} removes {remove!r}, not a technology name")
+        if remove:
+            items = [item for item in items if _item_name(item) != remove.lower()]
+
+        add = edit.get("add")
+        if add:
+            if isinstance(add, str):
+                add = {"name": add}
+            if not isinstance(add, dict) or not isinstance(add.get("name"), str) or not add["name"].strip():
+                raise ValueError(f"Edit for {category} adds a technology without a name")
+            add = {"name": add["name"], "description": add.get("description", ""), "docLink": add.get("docLink", "")}
+            #replacing a tool keeps its position so the rest of the category reads the same
+            position = next(
+                (i for i, item in enumerate(before)
+                 if remove and _item_name(item) == remove.lower()),
+                len(items)
+            )
+            items.insert(min(position, len(items)), add)
+
+        new_stack[category] = items
+        if items != before:
+            changed.add(category)
+
+    return new_stack, changed
+
+def _item_name(item: Any) -> Any:
+    """The lowercased name of a stack item, or None for items without a usable name, which never match."""
+    name = item.get("name") if isinstance(item, dict) else None
+    return name.lower() if isinstance(name, str) else None
+
+def _task_number(task_id: Any) -> int:
+    match = re.fullmatch(r"task-(\d+)", str(task_id or ""))
+    return int(match.group(1)) if match else 0
+
+def merge_replanned_tasks(
+    tasks: List[Dict[str, Any]],
+    new_tasks_by_category: Dict[str, List[Dict[str, Any]]]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Replace the tasks of the regenerated categories, keeping every other task (and its id) as is.
+    New tasks are numbered after the highest existing id so ids are never reused.
+    """
+    next_number = max((_task_number(task.get("id")) for task in tasks), default=0) + 1
+    removed = [task.get("id") for task in tasks if task.get("category") in new_tasks_by_category]
+
+    added = []
+    for category in CATEGORIES:
+        for task in new_tasks_by_category.get(category, []):
+            if not isinstance(task, dict):
+                continue
+            task["id"] = f"task-{next_number}"
+            task["category"] = category
+            subtasks = task.get("subtasks", [])
+            if isinstance(subtasks, list):
+                for j, subtask in enumerate(subtasks):
+                    if isinstance(subtask, dict):
+                        subtask["id"] = f"subtask-{next_number}-{j+1}"
+            added.append(task)
+            next_number += 1
+
+    #keep the plan grouped by category, untouched tasks in their original order
+    merged = []
+    for category in CATEGORIES:
+        if category in new_tasks_by_category:
+            merged.extend(task for task in added if task["category"] == category)
+        else:
+            merged.extend(task for task in tasks if task.get("category") == category)
+    merged.extend(task for task in tasks if task.get("category") not in CATEGORIES)
+
+    diff = {
+        "categories": sorted(new_tasks_by_category, key=CATEGORIES.index),
+        "added": added,
+        "removed": removed,
+        "kept": [task.get("id") for task in merged if task.get("category") not in new_tasks_by_category],
+    }
+    return merged, diff
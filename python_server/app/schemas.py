@@ -0,0 +1,98 @@
+"""
+Response schemas for the structured (JSON mode) LLM calls.
+
+With STRUCTURED_OUTPUT on (the default), the curator, category and prompt tasks hand
+these models to crewai as `response_model`, which the Gemini provider turns into a
+response schema. Answers are validated here and only fall back to the old
+free-text extraction when they do not conform.
+"""
+from collections import Counter
+from typing import Any, Callable, List, Optional, Type
+import os
+import threading
+from pydantic import BaseModel, ValidationError
+
+class TechnologyOutput(BaseModel):
+    name: str
+    description: str
+    docLink: str
+
+class TechStackOutput(BaseModel):
+    #categories default to empty so a partial (repair) answer validates too
+    type: str = ""
+    setup: List[TechnologyOutput] = []
+    frontend: List[TechnologyOutput] = []
+    backend: List[TechnologyOutput] = []
+    testing: List[TechnologyOutput] = []
+    deploy: List[TechnologyOutput] = []
+    maintain: List[TechnologyOutput] = []
+
+class SubtaskOutput(BaseModel):
+    id: Optional[str] = None
+    text: str
+    completed: bool = False
+
+class CategoryTaskOutput(BaseModel):
+    id: Optional[str] = None
+    text: str
+    completed: bool = False
+    category: str
+    subtasks: List[SubtaskOutput] = []
+
+class CategoryTasksOutput(BaseModel):
+    tasks: List[CategoryTaskOutput]
+
+class TaskPromptsOutput(BaseModel):
+    prompt: str
+    subtaskPrompts: List[str] = []
+
+def structured_output_enabled() -> bool:
+    return os.getenv("STRUCTURED_OUTPUT", "true").lower() == "true"
+
+def response_model(schema: Type[BaseModel]) -> Optional[Type[BaseModel]]:
+    """The schema to put on a crewai Task, or None when structured output is switched off."""
+    return schema if structured_output_enabled() else None
+
+_stats_lock = threading.Lock()
+_parse_stats: Counter = Counter()
+
+def parse_stats() -> dict:
+    """How each schema's answers were parsed: "structured", "fallback" or "failed"."""
+    with _stats_lock:
+        stats = {}
+        for (schema, outcome), count in _parse_stats.items():
+            stats.setdefault(schema, {})[outcome] = count
+        return stats
+
+def _record(schema: Type[BaseModel], outcome: str) -> None:
+    with _stats_lock:
+        _parse_stats[(schema.__name__, outcome)] += 1
+
+def parse_structured(raw: Any, schema: Type[BaseModel]) -> Optional[dict]:
+    """The answer as a dict if it is exactly a JSON document matching `schema`, else None."""
+    if isinstance(raw, schema):
+        return raw.model_dump()
+    if raw is None:
+        return None
+    try:
+        return schema.model_validate_json(str(raw).strip()).model_dump()
+    except ValidationError:
+        return None
+
+def parse_output(raw: Any, schema: Type[BaseModel], fallback: Callable[[Any], Any]) -> Any:
+    """
+    Validate `raw` against `schema`, falling back to the free-text extraction `fallback`
+    (which returns something falsy or raises on failure). Every outcome is counted in parse_stats().
+    """
+    parsed = parse_structured(raw, schema)
+    if parsed is not None:
+        _record(schema, "structured")
+        return parsed
+
+    try:
+        extracted = fallback(raw)
+    except Exception:
+        _record(schema, "failed")
+        raise
+    _record(schema, "fallback" if extracted else "failed")
+    return extracted
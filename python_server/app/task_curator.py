@@ -1,17 +1,31 @@
-from crewai import Agent, Task, Crew, Process, LLM
+from crewai import Agent, Task, Crew, Process
 from textwrap import dedent
 import os
 import json
+import re
 from typing import List, Dict, Any, Optional
+from .cache import TTLCache, normalize_text, stable_hash
+from .cancellation import check_cancelled
+from .llm import create_llm
+from .profiling import stage
+from .records import TaskRecord, TechnologyRecord, tasks_from_items
+from .schemas import CategoryTasksOutput, parse_output, response_model
+
+#per-category task lists, keyed on everything that goes into that category's prompt
+_category_task_cache = TTLCache(
+    max_entries=int(os.getenv("TASK_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("TASK_CACHE_TTL_SECONDS", "86400"))
+)
 
 class TaskGenerationCrew:
     def __init__(self):
-        self.llm = LLM(
-            model="gemini/gemini-2.0-flash",
-            temperature=0.7,
-            api_key=os.getenv("GEMINI_API_KEY")
-        )
-        
+        #each category and the coordinator can be routed to its own model (see LLM_ROUTES in app/llm.py)
+        self.coordinator_llm = create_llm(temperature=0.7, route="coordinator")
+        self.category_llms = {
+            category: create_llm(temperature=0.7, route=f"category.{category}")
+            for category in ["setup", "frontend", "backend", "testing", "deploy", "maintain"]
+        }
+
         self.category_agents = {
             "setup": self._create_setup_agent(),
             "frontend": self._create_frontend_agent(),
@@ -30,17 +44,15 @@ class TaskGenerationCrew:
             "maintain": "maintain"
         }
 
-    def generate_tasks(self, project_description, priority, tech_stack_by_category, project_type) -> Dict[str, Any]:
+    def generate_tasks(self, project_description, priority, tech_stack_by_category, project_type, template_tasks_by_category=None,
+                       template_tech_stack=None) -> Dict[str, Any]:
+        """
+        Generate the plan's tasks, category by category. `template_tasks_by_category` (e.g. warmed for this
+        project profile by app/profile_warmer.py) stands in for categories that came back empty, but only
+        where `template_tech_stack`, the stack the templates were generated for, has the same technologies.
+        The tasks are TaskRecords in plan order; tasks_to_dicts numbers them for the response.
+        """
         try:
-            if priority and "Speed" in priority:
-                coordinator_agent = self._create_speed_agent()
-            elif priority and "Scalability" in priority:
-                coordinator_agent = self._create_scalability_agent()
-            else:
-                coordinator_agent = self._create_speed_agent()  # default to speed if no priority
-            
-            category_tasks = []
-            
             #ensure all core categories are included
             required_categories = ["setup", "frontend", "backend", "testing", "deploy", "maintain"]
             
@@ -49,37 +61,26 @@ class TaskGenerationCrew:
                 if category not in tech_stack_by_category:
                     tech_stack_by_category[category] = []
             
-            #create tasks for all required categories
-            for category in required_categories:
-                if category not in self.category_agents:
-                    continue
-                    
-                category_task = self._create_category_task(
-                    category=category,
-                    project_description=project_description,
-                    priority=priority,
-                    tech_stack=tech_stack_by_category.get(category, []),
-                    project_type=project_type,
-                    agent=self.category_agents[category]
-                )
-                category_tasks.append(category_task)
-            
-            #create the crew with coordinator agent first, followed by category agents
-            all_agents = [coordinator_agent] + [self.category_agents[cat] for cat in required_categories if cat in self.category_agents]
-            
-            crew = Crew(
-                agents=all_agents,
-                tasks=category_tasks,
-                verbose=True,
-                process=Process.sequential
+            categories = [cat for cat in required_categories if cat in self.category_agents]
+            tasks_by_category = self.generate_category_tasks(
+                project_description=project_description,
+                priority=priority,
+                tech_stack_by_category=tech_stack_by_category,
+                project_type=project_type,
+                categories=categories
             )
-            
-            results = crew.kickoff()
-            combined_tasks = self._combine_category_results(results)
+            for category in categories:
+                if tasks_by_category.get(category) or not (template_tasks_by_category or {}).get(category):
+                    continue
+                #templates for other tools would contradict the plan's tech stack; the category stays empty then
+                if self._same_technologies(tech_stack_by_category.get(category, []), (template_tech_stack or {}).get(category, [])):
+                    print(f"Using the profile template for {category} tasks")
+                    tasks_by_category[category] = template_tasks_by_category[category]
+            combined_tasks = self._combine_category_results(tasks_by_category, categories)
             tasks_list = combined_tasks.get("tasks", [])
             
             task_count = len(tasks_list)
-            subtask_count = sum(len(task.get("subtasks", [])) for task in tasks_list)
+            subtask_count = sum(len(task.subtasks) for task in tasks_list)
             
             return {
                 "tasks": tasks_list,
@@ -96,68 +97,138 @@ class TaskGenerationCrew:
                 "subtaskCount": 0
             }
 
-    def _combine_category_results(self, crew_output) -> Dict[str, Any]:
-        all_tasks = []
+    def generate_category_tasks(self, project_description, priority, tech_stack_by_category, project_type, categories) -> Dict[str, List[TaskRecord]]:
+        """
+        Generate the task lists of the given categories as TaskRecords, without assigning ids.
 
-        if not crew_output or not hasattr(crew_output, 'tasks_output') or not crew_output.tasks_output:
-            if hasattr(crew_output, 'raw'):
-                results_str = str(crew_output.raw)
-                import re
-                import json
-                json_match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```', results_str)
-                if json_match:
-                    try:
-                        json_str = json_match.group(1)
-                        parsed_json = json.loads(json_str)
-                        if isinstance(parsed_json, dict) and "tasks" in parsed_json:
-                            tasks_from_raw = parsed_json["tasks"]
-                            all_tasks.extend(tasks_from_raw)
-                    except json.JSONDecodeError:
-                        pass
-                    except Exception:
-                        pass
+        Categories whose inputs have not changed since an earlier plan are served from cache;
+        the rest are generated by a single crew run.
+        """
+        cache_keys = {}
+        tasks_by_category = {}
+        pending_categories = []
+        for category in categories:
+            cache_keys[category] = self._category_cache_key(
+                category, project_description, priority, project_type, tech_stack_by_category.get(category, [])
+            )
+            cached = _category_task_cache.get(cache_keys[category])
+            if cached is not None:
+                #records are immutable, so cached lists are shared rather than deep-copied
+                tasks_by_category[category] = cached
+            else:
+                pending_categories.append(category)
+        
+        print(f"Category task cache: {len(tasks_by_category)} hits, {len(pending_categories)} to generate")
+        if not pending_categories:
+            return tasks_by_category
+        check_cancelled()
 
-            if not all_tasks:
-                return {"tasks": []}
+        if priority and "Speed" in priority:
+            coordinator_agent = self._create_speed_agent()
+        elif priority and "Scalability" in priority:
+            coordinator_agent = self._create_scalability_agent()
         else:
-            import re
-            import json
+            coordinator_agent = self._create_speed_agent()  # default to speed if no priority
 
-            for task_output in crew_output.tasks_output:
-                if not hasattr(task_output, 'raw'):
-                    continue
+        #create tasks for the categories we could not serve from cache
+        category_tasks = []
+        for category in pending_categories:
+            category_task = self._create_category_task(
+                category=category,
+                project_description=project_description,
+                priority=priority,
+                tech_stack=tech_stack_by_category.get(category, []),
+                project_type=project_type,
+                agent=self.category_agents[category]
+            )
+            category_tasks.append(category_task)
+        
+        #create the crew with coordinator agent first, followed by category agents
+        all_agents = [coordinator_agent] + [self.category_agents[cat] for cat in pending_categories]
+        
+        crew = Crew(
+            agents=all_agents,
+            tasks=category_tasks,
+            verbose=True,
+            process=Process.sequential
+        )
+        
+        with stage("task_crew"):
+            results = crew.kickoff()
+        with stage("json_parsing"):
+            generated = self._split_category_results(results, pending_categories)
+
+        for category, tasks in generated.items():
+            if tasks:
+                _category_task_cache.set(cache_keys[category], tasks)
+                tasks_by_category[category] = tasks
+
+        return tasks_by_category
 
-                results_str = str(task_output.raw)
-                json_match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```', results_str)
-                if json_match:
-                    try:
-                        json_str = json_match.group(1)
-                        parsed_json = json.loads(json_str)
-                        if isinstance(parsed_json, dict) and "tasks" in parsed_json:
-                            tasks_from_agent = parsed_json["tasks"]
-                            all_tasks.extend(tasks_from_agent)
-                    except json.JSONDecodeError:
-                        pass
-                    except Exception:
-                        pass
+    def _same_technologies(self, tech_stack, other_tech_stack) -> bool:
+        def names(items):
+            return {normalize_text(item.name if isinstance(item, TechnologyRecord) else item.get("name")) for item in items or []
+                    if isinstance(item, (TechnologyRecord, dict))}
+        return names(tech_stack) == names(other_tech_stack)
 
-        if not all_tasks:
-            return {"tasks": []}
+    def _category_cache_key(self, category, project_description, priority, project_type, tech_stack) -> str:
+        return stable_hash({
+            "category": category,
+            "description": stable_hash(normalize_text(project_description)),
+            "priority": priority or "",
+            "project_type": project_type,
+            "tech_stack": [tech.to_dict() if isinstance(tech, TechnologyRecord) else tech for tech in tech_stack],
+        })
 
-        final_tasks = []
-        for i, task in enumerate(all_tasks):
-            if isinstance(task, dict):
-                task["id"] = f"task-{i+1}"
-                if "category" not in task:
-                    task["category"] = "unknown"
-                subtasks = task.get("subtasks", [])
-                if isinstance(subtasks, list):
-                    for j, subtask in enumerate(subtasks):
-                        if isinstance(subtask, dict):
-                            subtask["id"] = f"subtask-{i+1}-{j+1}"
-                final_tasks.append(task)
+    def _parse_tasks_json(self, raw) -> List[Dict[str, Any]]:
+        parsed = parse_output(raw, CategoryTasksOutput, self._scrape_tasks_json)
+        return parsed.get("tasks", []) if isinstance(parsed, dict) else parsed
+
+    def _scrape_tasks_json(self, raw) -> List[Dict[str, Any]]:
+        """Free-text fallback: the tasks object inside a ```json block of the answer."""
+        results_str = str(raw)
+        json_match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```', results_str)
+        if json_match:
+            try:
+                json_str = json_match.group(1)
+                parsed_json = json.loads(json_str)
+                if isinstance(parsed_json, dict) and "tasks" in parsed_json:
+                    return parsed_json["tasks"]
+            except json.JSONDecodeError:
+                pass
+            except Exception:
+                pass
+        return []
+
+    def _split_category_results(self, crew_output, categories) -> Dict[str, List[TaskRecord]]:
+        """Map the crew's outputs back to the categories that were generated, in task order."""
+        generated = {}
+
+        if not crew_output or not hasattr(crew_output, 'tasks_output') or not crew_output.tasks_output:
+            if hasattr(crew_output, 'raw'):
+                #without per-task outputs we can only attribute tasks by their category field
+                for task in tasks_from_items(self._parse_tasks_json(crew_output.raw)):
+                    if task.category in categories:
+                        generated.setdefault(task.category, []).append(task)
+            return generated
+
+        for category, task_output in zip(categories, crew_output.tasks_output):
+            if not hasattr(task_output, 'raw'):
+                continue
+            generated[category] = tasks_from_items(self._parse_tasks_json(task_output.raw))
+
+        return generated
+
+    def _combine_category_results(self, tasks_by_category, categories=None) -> Dict[str, Any]:
+        categories = categories or list(self.category_agents)
+
+        #merge in category order so ids, assigned from positions when the plan is serialized,
+        #are the same whether a category came from cache or the LLM
+        all_tasks = []
+        for category in categories:
+            all_tasks.extend(tasks_by_category.get(category, []))
 
-        return {"tasks": final_tasks}
+        return {"tasks": all_tasks}
     
     def _create_category_task(self, category, project_description, priority, tech_stack, project_type, agent) -> Task:
         priority_context = ""
@@ -169,6 +240,8 @@ class TaskGenerationCrew:
         
         tech_details = []
         for tech in tech_stack:
+            if isinstance(tech, TechnologyRecord):
+                tech = tech.to_dict()
             if isinstance(tech, dict) and "name" in tech and "description" in tech:
                 tech_details.append(f"- {tech['name']}: {tech['description']}")
                 if "docLink" in tech:
@@ -225,7 +298,8 @@ class TaskGenerationCrew:
                 }}
             """),
             expected_output=f"A JSON object containing task breakdown for the {category} category",
-            agent=agent
+            agent=agent,
+            response_model=response_model(CategoryTasksOutput)
         )
     
     #agent for speed and mvp
@@ -239,7 +313,7 @@ class TaskGenerationCrew:
                 You focus on delivering working software quickly with minimal overhead.
                 You know how to identify core functionality and defer nice-to-have features.
             """),
-            llm=self.llm,
+            llm=self.coordinator_llm,
             verbose=True
         )
     
@@ -254,7 +328,7 @@ class TaskGenerationCrew:
                 You focus on creating a solid foundation that can grow with the project.
                 You understand microservices, distributed systems, and cloud-native architectures.
             """),
-            llm=self.llm,
+            llm=self.coordinator_llm,
             verbose=True
         )
     
@@ -268,7 +342,7 @@ class TaskGenerationCrew:
                 You understand the importance of standardizing development environments across teams.
                 You create tasks that incorporate the specific setup tools recommended in the tech stack.
             """),
-            llm=self.llm,
+            llm=self.category_llms["setup"],
             verbose=True
         )
     
@@ -282,7 +356,7 @@ class TaskGenerationCrew:
                 You know how to break down complex UI requirements into manageable tasks.
                 You create tasks that incorporate the specific frontend technologies recommended in the tech stack.
             """),
-            llm=self.llm,
+            llm=self.category_llms["frontend"],
             verbose=True
         )
     
@@ -296,7 +370,7 @@ class TaskGenerationCrew:
                 You know how to create tasks for implementing secure and efficient backend systems.
                 You create tasks that incorporate the specific backend technologies recommended in the tech stack.
             """),
-            llm=self.llm,
+            llm=self.category_llms["backend"],
             verbose=True
         )
     
@@ -310,7 +384,7 @@ class TaskGenerationCrew:
                 You know how to create tasks for implementing effective test coverage and QA processes.
                 You create tasks that incorporate the specific testing tools recommended in the tech stack.
             """),
-            llm=self.llm,
+            llm=self.category_llms["testing"],
             verbose=True
         )
     
@@ -324,7 +398,7 @@ class TaskGenerationCrew:
                 You know how to create tasks for setting up reliable and secure deployment processes.
                 You create tasks that incorporate the specific deployment technologies recommended in the tech stack.
             """),
-            llm=self.llm,
+            llm=self.category_llms["deploy"],
             verbose=True
         )
     
@@ -338,6 +412,6 @@ class TaskGenerationCrew:
                 You know how to create tasks for implementing effective maintenance and support processes.
                 You create tasks that incorporate the specific maintenance tools recommended in the tech stack.
             """),
-            llm=self.llm,
+            llm=self.category_llms["maintain"],
             verbose=True
         )
\ No newline at end of file
@@ -1,48 +1,170 @@
-from crewai import Agent, Task, Crew, Process, LLM
+from crewai import Agent, Task, Crew, Process
 from crewai.tools import BaseTool
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Tuple
+import contextvars
 import json
 import os
+import re
+import threading
 import time
+from .cancellation import check_cancelled
+from .llm import create_llm
+from .profiling import stage
+from .records import TechnologyRecord
+from .schemas import TechStackOutput, parse_output, response_model
+
+def brave_search(api_key: str, query: str, count: int = 3) -> List[Dict[str, str]]:
+    """The top `count` web results for `query` as {title, url, description} dicts."""
+    import requests
+    url = os.getenv("BRAVE_API_URL", "https://api.search.brave.com/res/v1/web/search")
+    params = {
+        "q": query,
+        "count": count
+    }
+    headers = {
+        "Accept": "application/json",
+        "X-Subscription-Token": api_key.replace("brave_", "")
+    }
+    response = requests.get(url, params=params, headers=headers, timeout=float(os.getenv("BRAVE_SEARCH_TIMEOUT_SECONDS", "10")))
+    results = response.json()
+    return [
+        {
+            "title": result.get('title', 'No title'),
+            "url": result.get('url', 'No URL'),
+            "description": result.get('description', 'No description')
+        }
+        for result in results.get("web", {}).get("results", [])
+    ]
+
+def format_result(result: Dict[str, str]) -> str:
+    return f"Title: {result['title']}\nLink: {result['url']}\nDescription: {result['description']}\n"
+
+class SearchBudget:
+    """Web search queries a research run may still make, shared by its search tools."""
+
+    def __init__(self, max_queries: int):
+        self.max_queries = max_queries
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.used = 0
+
+    def take(self, wanted: int) -> int:
+        """Reserve up to `wanted` queries; returns how many were granted."""
+        with self._lock:
+            granted = max(0, min(wanted, self.max_queries - self.used))
+            self.used += granted
+            return granted
+
+SEARCH_BUDGET_EXHAUSTED = "Search budget for this research is used up. Continue with the results you already have."
+NO_SEARCH_QUERIES = "No search queries given. Pass one or more non-empty queries."
 
 class BraveSearchTool(BaseTool):
     name: str = "brave_search"
     description: str = "Search for technology information using Brave Search API"
     api_key: Optional[str] = None
+    budget: Any = None
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, budget: Optional[SearchBudget] = None):
         super().__init__()
         self.api_key = api_key
+        self.budget = budget
     
     def _run(self, query: str) -> str:
         if not self.api_key:
             return "Brave Search API key not provided. Using internal knowledge only."
+        check_cancelled()
+        if self.budget and not self.budget.take(1):
+            return SEARCH_BUDGET_EXHAUSTED
         
         try:
-            import requests
-            url = "https://api.search.brave.com/res/v1/web/search"
-            params = {
-                "q": query,
-                "count": 3  # Limit to top 3 results
-            }
-            headers = {
-                "Accept": "application/json",
-                "X-Subscription-Token": self.api_key.replace("brave_", "")
-            }
-            response = requests.get(url, params=params, headers=headers)
-            results = response.json()
-            
-            formatted_results = []
-            for result in results.get("web", {}).get("results", []):
-                title = result.get('title', 'No title')
-                url = result.get('url', 'No URL')
-                description = result.get('description', 'No description')
-                formatted_results.append(f"Title: {title}\nLink: {url}\nDescription: {description}\n")
-            
-            return "\n".join(formatted_results)
+            with stage("web_search"):
+                results = brave_search(self.api_key, query)
+            return "\n".join(format_result(result) for result in results)
         except Exception as e:
             return "Error performing web search. Using internal knowledge only."
 
+class BatchSearchInput(BaseModel):
+    queries: List[str] = Field(..., description="Search queries to run together, e.g. one per project category")
+
+class BraveBatchSearchTool(BaseTool):
+    name: str = "brave_batch_search"
+    description: str = (
+        "Search for technology information using Brave Search API with several queries at once "
+        "(for example one per project category). Prefer this over brave_search when you have more than one question."
+    )
+    args_schema: type[BaseModel] = BatchSearchInput
+    api_key: Optional[str] = None
+    budget: Any = None
+    max_queries: int = 6
+    max_chars: int = 6000
+    parallel: int = 4
+
+    def __init__(self, api_key: Optional[str] = None, budget: Optional[SearchBudget] = None):
+        super().__init__()
+        self.api_key = api_key
+        self.budget = budget
+        self.max_queries = max(1, int(os.getenv("BRAVE_BATCH_MAX_QUERIES", "6")))
+        self.max_chars = int(os.getenv("BRAVE_BATCH_MAX_CHARS", "6000"))
+        self.parallel = max(1, int(os.getenv("BRAVE_SEARCH_PARALLEL", "4")))
+
+    def _run(self, queries: List[str]) -> str:
+        if not self.api_key:
+            return "Brave Search API key not provided. Using internal knowledge only."
+        check_cancelled()
+
+        #drop repeated queries, then keep what the batch size and the research's search budget allow
+        unique_queries = []
+        seen = set()
+        for query in queries if isinstance(queries, list) else [queries]:
+            key = " ".join(str(query).lower().split())
+            if key and key not in seen:
+                seen.add(key)
+                unique_queries.append(str(query).strip())
+        if not unique_queries:
+            return NO_SEARCH_QUERIES
+        unique_queries = unique_queries[:self.max_queries]
+        granted = self.budget.take(len(unique_queries)) if self.budget else len(unique_queries)
+        if not granted:
+            return SEARCH_BUDGET_EXHAUSTED
+        budget_cut = granted < len(unique_queries)
+        unique_queries = unique_queries[:granted]
+
+        def search(query: str):
+            try:
+                return brave_search(self.api_key, query)
+            except Exception:
+                return None
+
+        with stage("web_search"), ThreadPoolExecutor(max_workers=min(self.parallel, len(unique_queries))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, search, query) for query in unique_queries]
+            all_results = [future.result() for future in futures]
+
+        #merge in query order, each link only once, up to the size cap
+        sections = []
+        seen_urls = set()
+        size = 0
+        for query, results in zip(unique_queries, all_results):
+            if results is None:
+                section = f"Query: {query}\nError performing web search for this query.\n"
+            else:
+                fresh = [result for result in results if result["url"] not in seen_urls]
+                seen_urls.update(result["url"] for result in fresh)
+                section = f"Query: {query}\n" + ("\n".join(format_result(result) for result in fresh) or "No new results.\n")
+            if size + len(section) > self.max_chars:
+                sections.append("(further results omitted to keep the answer short)")
+                break
+            sections.append(section)
+            size += len(section)
+
+        if budget_cut:
+            sections.append(SEARCH_BUDGET_EXHAUSTED)
+        return "\n".join(sections)
+
 class TechStackCuratorCrew:
     """
     A crew that curates a tech stack based on user preferences and project priorities.
@@ -50,14 +172,23 @@ class TechStackCuratorCrew:
     based on project priority.
     """
     
+    CATEGORIES = ["setup", "frontend", "backend", "testing", "deploy", "maintain"]
+
+    #hosting platforms, as opposed to deploy tooling such as Docker or GitHub Actions that works alongside one
+    WEB_DEPLOY_PLATFORMS = [
+        "vercel", "netlify", "heroku", "aws amplify", "render", "railway", "fly.io", "github pages", "cloudflare pages",
+        "firebase hosting", "cloud run", "app engine", "elastic beanstalk", "azure app service", "digitalocean app platform"
+    ]
+    MOBILE_DEPLOY_PLATFORMS = ["expo", "fastlane", "app center", "codepush", "appcenter", "firebase app distribution", "testflight"]
+
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
-        self.llm = LLM(
-            model="gemini/gemini-2.0-flash",
-            temperature=0.7,
-            api_key=os.getenv("GEMINI_API_KEY")
-        )
-        self.search_tool = BraveSearchTool(api_key=api_key)
+        self.research_llm = create_llm(temperature=0.7, route="research")
+        self.curator_llm = create_llm(temperature=0.7, route="curation")
+        #both search tools draw on one per-research budget of queries
+        self.search_budget = SearchBudget(int(os.getenv("RESEARCH_SEARCH_BUDGET", "8")))
+        self.search_tool = BraveSearchTool(api_key=api_key, budget=self.search_budget)
+        self.batch_search_tool = BraveBatchSearchTool(api_key=api_key, budget=self.search_budget)
         self.agents = self._create_agents()
         
     def _create_agents(self) -> Dict[str, Agent]:
@@ -69,8 +200,8 @@ class TechStackCuratorCrew:
             You understand how different tools complement each other and can identify the best options based on project requirements.""",
             verbose=True,
             allow_delegation=False,
-            llm=self.llm,
-            tools=[self.search_tool]
+            llm=self.research_llm,
+            tools=[self.batch_search_tool, self.search_tool]
         )
         
         curator_agent = Agent(
@@ -81,7 +212,7 @@ class TechStackCuratorCrew:
             You create practical, well-reasoned recommendations that consider the team's experience level.""",
             verbose=True,
             allow_delegation=False,
-            llm=self.llm
+            llm=self.curator_llm
         )
         
         return {
@@ -143,8 +274,18 @@ class TechStackCuratorCrew:
         known_tech: List[str] = None,
         disliked_tech: List[str] = None,
         starred_tech: List[str] = None,
-        max_retries: int = 3
+        max_retries: int = 3,
+        research_findings: Optional[str] = None,
+        fallback_stack: Optional[Dict[str, Any]] = None,
+        skip_research: bool = False
     ) -> Dict[str, Any]:
+        """
+        Research and curate a tech stack. `research_findings` (e.g. warmed for this project profile by
+        app/profile_warmer.py) are given to the curator as extra context next to this request's own
+        research; with `skip_research` they replace it. `fallback_stack` fills categories that neither
+        curation nor repair produced.
+        Each category of the result is a list of TechnologyRecords (see stack_to_dict for the response form).
+        """
         try:
             known_tech = known_tech or []
             disliked_tech = disliked_tech or []
@@ -152,22 +293,24 @@ class TechStackCuratorCrew:
 
             for attempt in range(max_retries):
                 try:
-                    research_tech = Task(
-                        description=f"""
-                        Consider the user's technology background and preferences:
-                        - Technologies they have experience with: {', '.join(known_tech) if known_tech else 'None'}
-                        - Technologies to avoid: {', '.join(disliked_tech) if disliked_tech else 'None'}
-                        - Priority technologies: {', '.join(starred_tech) if starred_tech else 'None'}
-                        
-                        Project Description: {project_description}
-                        
-                        Research and recommend technologies for this {project_type} project.
-                        Focus on tools that align with the project's core requirements and avoid redundant frameworks.
-                        """,
-                        expected_output="A structured list of technology research findings.",
-                        agent=self.agents["research"]
+                    research_tech = None if research_findings and skip_research else self._research_task(
+                        project_type, project_description, known_tech, disliked_tech, starred_tech
                     )
-                    
+                    if not research_findings:
+                        findings_context = ""
+                    elif research_tech:
+                        findings_context = f"""
+                        Background findings for a typical {project_type} project, not specific to this project or user
+                        (the research above takes precedence):
+                        {research_findings}
+                        """
+                    else:
+                        findings_context = f"""
+                        Research findings for a typical {project_type} project (use them as your starting point,
+                        adapted to this project description and the user's preferences):
+                        {research_findings}
+                        """
+
                     curation_tech = Task(
                         description=f"""
                         Create a tech stack recommendation for a {project_type} with {priority} as the main priority.
@@ -180,7 +323,7 @@ class TechStackCuratorCrew:
                         - Priority technologies: {', '.join(starred_tech) if starred_tech else 'None'}
                         
                         Create a practical, well-reasoned recommendation that considers the user's experience level.
-                        
+                        {findings_context}
                         IMPORTANT: Each technology recommendation MUST include:
                         1. name: The technology's name
                         2. description: A brief explanation (50-75 words) of what it does and why it fits
@@ -208,46 +351,44 @@ class TechStackCuratorCrew:
                         Each array (setup, frontend, etc.) should contain at least one technology with all required fields.
                         """,
                         expected_output="A clean JSON object containing the curated tech stack with detailed explanations.",
-                        agent=self.agents["curator"]
+                        agent=self.agents["curator"],
+                        response_model=response_model(TechStackOutput)
                     )
 
                     crew = Crew(
-                        agents=list(self.agents.values()),
-                        tasks=[research_tech, curation_tech],
+                        agents=[self.agents["research"], self.agents["curator"]] if research_tech else [self.agents["curator"]],
+                        tasks=[research_tech, curation_tech] if research_tech else [curation_tech],
                         process=Process.sequential,
                         verbose=True
                     )
 
-                    result = crew.kickoff()
+                    with stage("tech_stack_crew"):
+                        result = crew.kickoff()
                     
                     if result:
-                        tech_stack_data = self._extract_tech_stack_data(result)
-                        validated_data = self._validate_response(tech_stack_data)
-
-                        # Validate tech stack items
-                        if "error" not in validated_data:
-                            # Ensure each category has at least one valid item
-                            categories = ["setup", "frontend", "backend", "testing", "deploy", "maintain"]
-                            for category in categories:
-                                if category in validated_data:
-                                    items = validated_data[category]
-                                    if not isinstance(items, list):
-                                        validated_data[category] = []
-                                    else:
-                                        # Filter out invalid items
-                                        validated_data[category] = [
-                                            item for item in items
-                                            if isinstance(item, dict) and
-                                            all(key in item for key in ["name", "description", "docLink"])
-                                        ]
-                                        
-                                        # If no valid items, add a default
-                                        if not validated_data[category]:
-                                            validated_data[category] = [{
-                                                "name": f"Default {category} tool",
-                                                "description": f"Basic tool for {category} phase",
-                                                "docLink": "https://example.com"
-                                            }]
+                        with stage("json_parsing"):
+                            tech_stack_data = self._extract_tech_stack_data(result)
+                            validated_data = self._validate_response(tech_stack_data)
+
+                        #an unparseable answer still goes through repair, just with every category broken
+                        if "error" in validated_data:
+                            print(f"Could not parse tech stack: {validated_data['error']}")
+                            validated_data = {"type": project_type}
+
+                        validated_data, invalid = self._validate_tech_stack(validated_data, project_type, disliked_tech)
+                        if invalid:
+                            check_cancelled()
+                            validated_data = self._repair_categories(
+                                tech_stack=validated_data,
+                                invalid=invalid,
+                                project_type=project_type,
+                                priority=priority,
+                                project_description=project_description,
+                                known_tech=known_tech,
+                                disliked_tech=disliked_tech,
+                                starred_tech=starred_tech,
+                                fallback_stack=fallback_stack
+                            )
 
                         return validated_data
                             
@@ -268,6 +409,184 @@ class TechStackCuratorCrew:
             print(f"Error in curate_tech_stack: {str(e)}")
             return self._get_default_response(f"Error generating tech stack: {str(e)}")
         
+    def _research_task(self, project_type, project_description, known_tech, disliked_tech, starred_tech) -> Task:
+        #every research run gets the full search budget
+        self.search_budget.reset()
+        return Task(
+            description=f"""
+            Consider the user's technology background and preferences:
+            - Technologies they have experience with: {', '.join(known_tech) if known_tech else 'None'}
+            - Technologies to avoid: {', '.join(disliked_tech) if disliked_tech else 'None'}
+            - Priority technologies: {', '.join(starred_tech) if starred_tech else 'None'}
+            
+            Project Description: {project_description}
+            
+            Research and recommend technologies for this {project_type} project.
+            Focus on tools that align with the project's core requirements and avoid redundant frameworks.
+            
+            To search the web, call brave_batch_search once with all your queries (e.g. one per category:
+            setup, frontend, backend, testing, deploy, maintain) rather than brave_search once per query.
+            """,
+            expected_output="A structured list of technology research findings.",
+            agent=self.agents["research"]
+        )
+
+    def research(
+        self,
+        project_type: str,
+        project_description: str,
+        known_tech: List[str] = None,
+        disliked_tech: List[str] = None,
+        starred_tech: List[str] = None
+    ) -> Optional[str]:
+        """Run only the research agent and return its findings, e.g. to warm them for a popular project profile."""
+        crew = Crew(
+            agents=[self.agents["research"]],
+            tasks=[self._research_task(project_type, project_description, known_tech or [], disliked_tech or [], starred_tech or [])],
+            process=Process.sequential,
+            verbose=True
+        )
+        with stage("tech_stack_research"):
+            result = crew.kickoff()
+        findings = getattr(result, "raw", None) or (str(result) if result else None)
+        return findings.strip() if findings and findings.strip() else None
+
+    def _validate_tech_stack(self, tech_stack: Dict[str, Any], project_type: str, disliked_tech: List[str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Check the curated stack locally. Turns its items into TechnologyRecords, dropping malformed ones
+        and disliked technologies, applies the single-deploy-platform and mobile rules, and returns the
+        cleaned stack together with the categories that are still missing or empty, mapped to the reason.
+        """
+        invalid = {}
+        for category in self.CATEGORIES:
+            items = tech_stack.get(category)
+            if not isinstance(items, list) or not items:
+                tech_stack[category] = []
+                invalid[category] = "missing"
+                continue
+
+            valid_items = [record for record in map(TechnologyRecord.from_item, items) if record is not None]
+            allowed_items = [item for item in valid_items if not self._is_disliked(item.name, disliked_tech)]
+
+            tech_stack[category] = allowed_items
+            if not allowed_items:
+                invalid[category] = "only disliked technologies" if valid_items else "no valid technology entries"
+
+        #only one deployment platform is ever recommended; deploy tooling that is not a platform stays
+        platforms = [item for item in tech_stack["deploy"] if self._is_deploy_platform(item.name)]
+        if len(platforms) > 1:
+            tech_stack["deploy"] = [item for item in tech_stack["deploy"] if item is platforms[0] or item not in platforms]
+
+        if self._is_mobile_project(project_type):
+            tech_stack = self._validate_mobile_recommendations(tech_stack)
+            for category in ["frontend", "deploy"]:
+                #the mobile rule's defaults must not bring back a technology the user dislikes
+                tech_stack[category] = [item for item in tech_stack[category] if not self._is_disliked(item.name, disliked_tech)]
+                if tech_stack[category]:
+                    invalid.pop(category, None)
+                else:
+                    invalid.setdefault(category, "only disliked technologies")
+
+        return tech_stack, invalid
+
+    def _is_deploy_platform(self, name: str) -> bool:
+        name = name.lower()
+        return any(platform in name for platform in self.WEB_DEPLOY_PLATFORMS + self.MOBILE_DEPLOY_PLATFORMS)
+
+    def _is_disliked(self, name: str, disliked_tech: List[str]) -> bool:
+        return any(
+            #"Vue" matches "Vue.js" (a dot may follow the name), while "React" still does not match "Preact"
+            re.search(rf"(?<![\w.]){re.escape(disliked.strip())}(?!\w)", name, re.IGNORECASE)
+            for disliked in disliked_tech if disliked and disliked.strip()
+        )
+
+    def _repair_categories(
+        self,
+        tech_stack: Dict[str, Any],
+        invalid: Dict[str, str],
+        project_type: str,
+        priority: str,
+        project_description: str,
+        known_tech: List[str],
+        disliked_tech: List[str],
+        starred_tech: List[str],
+        fallback_stack: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Ask the curator for just the broken categories in one small call, without re-running research."""
+        print(f"Repairing tech stack categories: {invalid}")
+        current = {
+            category: [item.name for item in tech_stack.get(category, [])]
+            for category in self.CATEGORIES if category not in invalid
+        }
+        problems = "\n".join(f"- {category}: {reason}" for category, reason in invalid.items())
+        example = ",\n".join(
+            f'    "{category}": [{{"name": "...", "description": "...", "docLink": "..."}}]' for category in invalid
+        )
+
+        repair_task = Task(
+            description=f"""
+            Complete a partial tech stack recommendation for a {project_type} with {priority} as the main priority.
+
+            Project Description: {project_description}
+
+            Technologies already chosen (keep them, recommend tools that work with them):
+            {json.dumps(current)}
+
+            These categories are missing or invalid and need recommendations:
+            {problems}
+
+            Consider the user's technology background and preferences:
+            - Technologies they have experience with: {', '.join(known_tech) if known_tech else 'None'}
+            - Technologies to avoid (never recommend these): {', '.join(disliked_tech) if disliked_tech else 'None'}
+            - Priority technologies: {', '.join(starred_tech) if starred_tech else 'None'}
+
+            Each technology MUST include name, description (50-75 words) and docLink (URL to official documentation).
+            Recommend exactly one platform for deploy.
+
+            The response MUST be a valid JSON object containing only these categories:
+            {{
+            {example}
+            }}
+            """,
+            expected_output="A clean JSON object with recommendations for the requested categories only.",
+            agent=self.agents["curator"],
+            response_model=response_model(TechStackOutput)
+        )
+
+        try:
+            crew = Crew(agents=[self.agents["curator"]], tasks=[repair_task], process=Process.sequential, verbose=True)
+            with stage("tech_stack_repair"):
+                result = crew.kickoff()
+            with stage("json_parsing"):
+                repaired = self._extract_tech_stack_data(result)
+        except Exception as e:
+            print(f"Tech stack repair failed: {str(e)}")
+            repaired = None
+
+        if isinstance(repaired, dict):
+            candidate = {category: repaired.get(category) for category in self.CATEGORIES if category in invalid}
+            candidate.update({category: tech_stack[category] for category in self.CATEGORIES if category not in invalid})
+            candidate, still_invalid = self._validate_tech_stack(candidate, project_type, disliked_tech)
+            for category in invalid:
+                if category not in still_invalid:
+                    tech_stack[category] = candidate[category]
+
+        unrepaired = [category for category in invalid if not tech_stack.get(category)]
+        if unrepaired and fallback_stack:
+            #a curated stack for the same kind of project beats an empty category; it still has to pass validation
+            #records are immutable, so the warm stack's items can be shared as they are
+            candidate = {category: list(fallback_stack.get(category) or []) for category in self.CATEGORIES}
+            candidate, still_invalid = self._validate_tech_stack(candidate, project_type, disliked_tech)
+            for category in unrepaired:
+                if category not in still_invalid:
+                    tech_stack[category] = candidate[category]
+            unrepaired = [category for category in unrepaired if not tech_stack.get(category)]
+
+        #categories that still failed stay empty rather than being padded with placeholders
+        if unrepaired:
+            print(f"Could not repair tech stack categories: {unrepaired}")
+        return tech_stack
+
     def _is_mobile_project(self, project_type: str) -> bool:
         """Check if the project type is mobile-related."""
         return "mobile" in project_type.lower() or "ios" in project_type.lower() or "android" in project_type.lower()
@@ -275,8 +594,8 @@ class TechStackCuratorCrew:
     def _validate_mobile_recommendations(self, tech_stack: Dict[str, Any]) -> Dict[str, Any]:
         """Validate and fix mobile-specific recommendations."""
         # Ensure we have the right tools for mobile deployment
-        mobile_deployment_tools = ["expo", "fastlane", "app center", "codepush", "appcenter", "firebase app distribution", "testflight"]
-        web_deployment_tools = ["vercel", "netlify", "heroku", "aws amplify"]
+        mobile_deployment_tools = self.MOBILE_DEPLOY_PLATFORMS
+        web_deployment_tools = self.WEB_DEPLOY_PLATFORMS
         
         # Check deployment section
         if "deploy" in tech_stack and tech_stack["deploy"]:
@@ -284,7 +603,7 @@ class TechStackCuratorCrew:
             has_web_deploy = False
             
             for deploy_tool in tech_stack["deploy"]:
-                tool_name = deploy_tool.get("name", "").lower()
+                tool_name = deploy_tool.name.lower()
                 if any(m_tool in tool_name for m_tool in mobile_deployment_tools):
                     has_mobile_deploy = True
                 if any(w_tool in tool_name for w_tool in web_deployment_tools):
@@ -295,16 +614,16 @@ class TechStackCuratorCrew:
                 # Remove web deployment tools
                 tech_stack["deploy"] = [
                     tool for tool in tech_stack["deploy"] 
-                    if not any(w_tool in tool.get("name", "").lower() for w_tool in web_deployment_tools)
+                    if not any(w_tool in tool.name.lower() for w_tool in web_deployment_tools)
                 ]
                 
                 # If we don't have any deployment tools left, add Expo as default
                 if not tech_stack["deploy"]:
-                    tech_stack["deploy"] = [{
-                        "name": "Expo",
-                        "description": "Expo is a framework and platform for universal React applications, simplifying the build and deployment process for mobile apps. It provides tools for easy app store submissions and over-the-air updates.",
-                        "docLink": "https://docs.expo.dev/"
-                    }]
+                    tech_stack["deploy"] = [TechnologyRecord(
+                        name="Expo",
+                        description="Expo is a framework and platform for universal React applications, simplifying the build and deployment process for mobile apps. It provides tools for easy app store submissions and over-the-air updates.",
+                        docLink="https://docs.expo.dev/"
+                    )]
         
         # Ensure we have mobile-specific frontend tools
         has_react_native = False
@@ -312,7 +631,7 @@ class TechStackCuratorCrew:
         
         if "frontend" in tech_stack and tech_stack["frontend"]:
             for frontend_tool in tech_stack["frontend"]:
-                tool_name = frontend_tool.get("name", "").lower()
+                tool_name = frontend_tool.name.lower()
                 if "react native" in tool_name:
                     has_react_native = True
                 if "flutter" in tool_name:
@@ -320,15 +639,21 @@ class TechStackCuratorCrew:
         
         # If no mobile frameworks found, add React Native as default
         if not has_react_native and not has_flutter and ("frontend" in tech_stack):
-            tech_stack["frontend"].insert(0, {
-                "name": "React Native",
-                "description": "React Native is a framework for building native mobile applications using React. It allows developers to use JavaScript to build mobile apps that run natively on iOS and Android.",
-                "docLink": "https://reactnative.dev/docs/getting-started"
-            })
+            tech_stack["frontend"].insert(0, TechnologyRecord(
+                name="React Native",
+                description="React Native is a framework for building native mobile applications using React. It allows developers to use JavaScript to build mobile apps that run natively on iOS and Android.",
+                docLink="https://reactnative.dev/docs/getting-started"
+            ))
             
         return tech_stack
     
     def _extract_tech_stack_data(self, result):
+        """Extract tech stack data from the curator's answer, schema-validated when it came from JSON mode."""
+        tasks_output = getattr(result, 'tasks_output', None)
+        raw = tasks_output[-1].raw if tasks_output else getattr(result, 'raw', None)
+        return parse_output(raw, TechStackOutput, lambda _: self._scrape_tech_stack_data(result))
+
+    def _scrape_tech_stack_data(self, result):
         """Extract tech stack data from any format of result."""
         # Try to get from tasks_output if available
         if hasattr(result, 'tasks_output') and result.tasks_output and len(result.tasks_output) > 1:
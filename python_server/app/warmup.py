@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+# litellm otherwise downloads its model price map on import, which stalls cold starts
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+_ready = threading.Event()
+_warming = threading.Event()
+_status: Dict[str, Any] = {"ready": False, "warmup_seconds": None, "warmup_attempts": 0, "error": None}
+
+def load_crews() -> Tuple[type, type]:
+    """Import the crew modules (and crewai with them) on first use."""
+    from .tech_stack_curator import TechStackCuratorCrew
+    from .task_curator import TaskGenerationCrew
+    return TechStackCuratorCrew, TaskGenerationCrew
+
+def load_prompt_crew() -> type:
+    from .prompt_engineer import PromptGenerationCrew
+    return PromptGenerationCrew
+
+def import_heavy_modules() -> None:
+    """Import crewai and the crews without building anything, e.g. in the gunicorn master before fork."""
+    load_crews()
+    load_prompt_crew()
+
+def mark_ready() -> None:
+    """The crews have been built once, by the warmup or by a request that built them itself."""
+    _status["ready"] = True
+    _status["error"] = None
+    _ready.set()
+
+def warm_up() -> None:
+    """
+    Import the crews and build their agents and LLM clients once so the first request does not pay for it.
+    A failed warmup is retried WARMUP_MAX_ATTEMPTS times, waiting WARMUP_RETRY_SECONDS and doubling.
+    """
+    attempts = int(os.getenv("WARMUP_MAX_ATTEMPTS", "5"))
+    delay = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+    try:
+        for attempt in range(1, attempts + 1):
+            #a request may have built the crews while we were waiting to retry
+            if _ready.is_set():
+                return
+            _status["warmup_attempts"] = attempt
+            started = time.perf_counter()
+            try:
+                TechStackCuratorCrew, TaskGenerationCrew = load_crews()
+                TechStackCuratorCrew(api_key=os.getenv("BRAVE_API_KEY"))
+                TaskGenerationCrew()
+            except Exception as e:
+                _status["error"] = str(e)
+                print(f"Warmup attempt {attempt} failed: {str(e)}")
+                if attempt < attempts:
+                    time.sleep(min(delay, 300))
+                    delay *= 2
+                continue
+
+            _status["warmup_seconds"] = round(time.perf_counter() - started, 3)
+            mark_ready()
+            print(f"Warmup finished in {_status['warmup_seconds']}s")
+            return
+    finally:
+        _warming.clear()
+
+def start_warmup() -> threading.Thread:
+    _warming.set()
+    thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+def warmup_pending() -> bool:
+    """Whether a startup warmup is still running (or waiting to retry) and the crews are not built yet."""
+    return _warming.is_set() and not _ready.is_set()
+
+def readiness() -> Dict[str, Any]:
+    return dict(_status)
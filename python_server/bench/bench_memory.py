@@ -0,0 +1,131 @@
+"""
+Memory and allocations of the plan pipeline with nested dicts vs. the records in app/records.py.
+
+    python bench/bench_memory.py [--plans 200] [--cached 2000]
+
+"batch" runs --plans large plans through the steps between parsing and the
+response body: validating the stack, handing it to task generation, the
+category task cache (half the plans repeat a project, so half the categories
+are cache hits), merging and numbering, and building the response. The dict
+path is how the pipeline used to do it: deep copies into and out of the cache,
+ids written into the task dicts. "cached" holds --cached category task lists
+in a cache, as the task cache and the profile warmer do. Reports tracemalloc's
+peak and retained memory, the blocks still allocated and the wall time.
+"""
+import argparse
+import copy
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.cache import TTLCache
+from app.records import TechnologyRecord, stack_to_dict, tasks_from_items, tasks_to_dicts
+from bench_payload import CATEGORIES, make_plan
+
+def make_answers(plans):
+    """The JSON text of each plan's curator and category answers, as they come back from the LLM."""
+    plan = make_plan(tech_per_category=4, tasks_per_category=12, subtasks_per_task=8)
+    stack_answer = json.dumps(plan["tech_stack"])
+    task_answers = {
+        category: json.dumps({"tasks": [task for task in plan["data"] if task["category"] == category]})
+        for category in CATEGORIES
+    }
+    #every other plan repeats an earlier project, so its categories are cache hits
+    return [(i // 2, stack_answer, task_answers) for i in range(plans)]
+
+def dict_pipeline(project, stack_answer, task_answers, cache):
+    tech_stack = json.loads(stack_answer)
+    for category in CATEGORIES:
+        tech_stack[category] = [
+            item for item in tech_stack[category]
+            if isinstance(item, dict) and all(isinstance(item.get(key), str) and item.get(key).strip() for key in ["name", "description", "docLink"])
+        ]
+    tech_stack_by_category = {category: tech_stack[category] for category in CATEGORIES}
+
+    tasks_by_category = {}
+    for category in CATEGORIES:
+        cached = cache.get((project, category, len(tech_stack_by_category[category])))
+        if cached is not None:
+            tasks_by_category[category] = copy.deepcopy(cached)
+        else:
+            tasks = json.loads(task_answers[category])["tasks"]
+            cache.set((project, category, len(tech_stack_by_category[category])), copy.deepcopy(tasks))
+            tasks_by_category[category] = tasks
+
+    all_tasks = [task for category in CATEGORIES for task in tasks_by_category[category]]
+    for i, task in enumerate(all_tasks):
+        task["id"] = f"task-{i+1}"
+        for j, subtask in enumerate(task.get("subtasks", [])):
+            subtask["id"] = f"subtask-{i+1}-{j+1}"
+    return {"success": True, "data": all_tasks, "tech_stack": tech_stack}
+
+def record_pipeline(project, stack_answer, task_answers, cache):
+    tech_stack = json.loads(stack_answer)
+    for category in CATEGORIES:
+        tech_stack[category] = [record for record in map(TechnologyRecord.from_item, tech_stack[category]) if record is not None]
+    tech_stack_by_category = {category: tech_stack[category] for category in CATEGORIES}
+
+    tasks_by_category = {}
+    for category in CATEGORIES:
+        cached = cache.get((project, category, len(tech_stack_by_category[category])))
+        if cached is not None:
+            tasks_by_category[category] = cached
+        else:
+            tasks = tasks_from_items(json.loads(task_answers[category])["tasks"])
+            cache.set((project, category, len(tech_stack_by_category[category])), tasks)
+            tasks_by_category[category] = tasks
+
+    all_tasks = [task for category in CATEGORIES for task in tasks_by_category[category]]
+    return {"success": True, "data": tasks_to_dicts(all_tasks), "tech_stack": stack_to_dict(tech_stack)}
+
+def measure(fn):
+    """(peak KiB, retained KiB, retained blocks, seconds) of fn(), keeping its result alive while measuring."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del result
+    return peak / 1024, current / 1024, blocks, seconds
+
+def batch(pipeline, answers):
+    cache = TTLCache(max_entries=len(answers) * len(CATEGORIES))
+    #the response bodies are sent and dropped; the cache is what outlives the batch
+    for project, stack_answer, task_answers in answers:
+        pipeline(project, stack_answer, task_answers, cache)
+    return cache
+
+def cached(pipeline, lists):
+    cache = TTLCache(max_entries=lists)
+    answer = make_answers(1)[0][2]["backend"]
+    for i in range(lists):
+        tasks = json.loads(answer)["tasks"]
+        cache.set(i, tasks if pipeline is dict_pipeline else tasks_from_items(tasks))
+    return cache
+
+def report(name, peak, retained, blocks, seconds):
+    print(f"  {name:<8} peak {peak:>10.0f} KiB   retained {retained:>10.0f} KiB   blocks {blocks:>9}   {seconds * 1000:>8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument("--cached", type=int, default=2000)
+    args = parser.parse_args()
+
+    answers = make_answers(args.plans)
+    print(f"\nbatch: {args.plans} plans of {12 * len(CATEGORIES)} tasks, 8 subtasks each")
+    for name, pipeline in (("dicts", dict_pipeline), ("records", record_pipeline)):
+        report(name, *measure(lambda: batch(pipeline, answers)))
+
+    print(f"\ncached: {args.cached} category task lists of 12 tasks")
+    for name, pipeline in (("dicts", dict_pipeline), ("records", record_pipeline)):
+        report(name, *measure(lambda: cached(pipeline, args.cached)))
+
+if __name__ == "__main__":
+    main()
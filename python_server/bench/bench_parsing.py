@@ -0,0 +1,121 @@
+"""
+Parse-failure and retry rates of free-text vs. structured (JSON mode) output, on the offline fake LLM backend.
+
+    python bench/bench_parsing.py --plans 20 --malformed-rate 0.15
+
+Runs the same plans (curation, six categories, prompts for the first few tasks)
+once with STRUCTURED_OUTPUT=false and once with it on. FAKE_LLM_MALFORMED_RATE
+damages that share of free-text JSON answers in the ways real answers break
+(prose around the JSON, unlabelled fences, trailing commas, Python dicts,
+truncation); in JSON mode only truncation can still happen, at
+--json-malformed-rate (by default a fifth of --malformed-rate). Reports how every
+answer was parsed, and the repairs, full crew retries and empty categories the
+failures caused.
+
+All rates are simulated: both failure rates are inputs to the fake, so the
+before/after difference follows from them and says nothing about a real
+provider. The benchmark shows how the fallback, repair and retry paths respond to
+a given failure rate; measure real rates from /metrics "parsing" in production.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+def run_plans(plans: int, prompt_tasks: int) -> dict:
+    """Child process: run the pipeline `plans` times and count what happened."""
+    sys.path.insert(0, str(SERVER_DIR))
+    from app.index import build_plan
+    from app.profiling import RequestProfile, _current_profile
+    from app.prompt_engineer import PromptGenerationCrew
+    from app.schemas import parse_stats
+
+    counts = Counter()
+    for i in range(plans):
+        profile = RequestProfile("bench_parsing")
+        token = _current_profile.set(profile)
+        try:
+            plan = build_plan({
+                #a distinct description per plan so the caches do not answer for the LLM
+                "description": f"A web app for planning weekly meals and sharing grocery lists with friends ({i})",
+                "priority": "Speed - Get a working MVP out quickly",
+                "background": {"known_tech": ["React", "Node.js"], "disliked_tech": [], "starred_tech": []}
+            })
+            prompts = PromptGenerationCrew().generate_prompts(plan["data"][:prompt_tasks], plan["tech_stack"])
+        finally:
+            _current_profile.reset(token)
+
+        stages = profile.stages
+        counts["llm_calls"] += stages.get("llm_call", {}).get("count", 0)
+        counts["tech_stack_repairs"] += stages.get("tech_stack_repair", {}).get("count", 0)
+        counts["tech_stack_crew_retries"] += max(0, stages.get("tech_stack_crew", {}).get("count", 0) - 1)
+        categories = {task.get("category") for task in plan["data"]}
+        counts["empty_categories"] += 6 - len(categories & {"setup", "frontend", "backend", "testing", "deploy", "maintain"})
+        counts["prompt_errors"] += len(prompts.get("errors", []))
+
+    return {"counts": dict(counts), "parsing": parse_stats()}
+
+def run_mode(structured: bool, args) -> dict:
+    env = dict(
+        os.environ,
+        LLM_BACKEND="fake",
+        FAKE_LLM_LATENCY_MS="0",
+        FAKE_LLM_MALFORMED_RATE=str(args.malformed_rate),
+        FAKE_LLM_JSON_MALFORMED_RATE=str(args.json_malformed_rate),
+        FAKE_LLM_SEED=str(args.seed),
+        STRUCTURED_OUTPUT="true" if structured else "false",
+        CREWAI_DISABLE_TELEMETRY="true",
+        OTEL_SDK_DISABLED="true",
+    )
+    with tempfile.NamedTemporaryFile(suffix=".json") as output:
+        subprocess.run(
+            [sys.executable, __file__, "--child", output.name, "--plans", str(args.plans), "--prompt-tasks", str(args.prompt_tasks)],
+            cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, check=True
+        )
+        return json.loads(Path(output.name).read_text())
+
+def report(label: str, result: dict, plans: int) -> None:
+    print(f"\n{label}")
+    total = Counter()
+    for schema, outcomes in sorted(result["parsing"].items()):
+        answers = sum(outcomes.values())
+        total.update(outcomes)
+        print(f"  {schema:<22} {answers:>5} answers  " + "  ".join(
+            f"{outcome} {outcomes.get(outcome, 0) / answers:6.1%}" for outcome in ("structured", "fallback", "failed")
+        ))
+    answers = sum(total.values())
+    if answers:
+        print(f"  {'parse failure rate':<22} {total['failed'] / answers:6.1%}")
+    counts = result["counts"]
+    for name in ("tech_stack_repairs", "tech_stack_crew_retries", "empty_categories", "prompt_errors", "llm_calls"):
+        print(f"  {name:<22} {counts.get(name, 0):>5}  ({counts.get(name, 0) / plans:.2f} per plan)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--prompt-tasks", type=int, default=3, help="tasks per plan to generate prompts for")
+    parser.add_argument("--malformed-rate", type=float, default=0.15, help="share of free-text JSON answers that are damaged")
+    parser.add_argument("--json-malformed-rate", type=float, help="share of JSON-mode answers that are truncated (default: a fifth of --malformed-rate)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        Path(args.child).write_text(json.dumps(run_plans(args.plans, args.prompt_tasks)))
+        return
+
+    if args.json_malformed_rate is None:
+        args.json_malformed_rate = args.malformed_rate / 5
+    print(f"{args.plans} plans, SIMULATED failure rates: free-text {args.malformed_rate:.1%}, JSON mode {args.json_malformed_rate:.1%}")
+    print("(both rates are inputs to the fake LLM, not measurements of a provider)")
+    report("before: free-text JSON (STRUCTURED_OUTPUT=false)", run_mode(False, args), args.plans)
+    report("after: JSON mode with response schemas (STRUCTURED_OUTPUT=true)", run_mode(True, args), args.plans)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Bytes on the wire and serialization time for typical and large plan payloads.
+
+    python bench/bench_payload.py [--repeat 200]
+
+Compares the default FastAPI path (jsonable_encoder + JSONResponse, when fastapi
+is installed) with the pre-serialized plan bodies from app/plan_store.py, and
+reports body size raw, gzipped and (when brotli is installed) brotli-compressed.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.compression import brotli, compress
+from app.plan_store import serialize_plan
+
+CATEGORIES = ["setup", "frontend", "backend", "testing", "deploy", "maintain"]
+
+WORDS = ("configure install deploy monitor route component schema database cache query migration "
+         "environment pipeline container secret token session endpoint layout state hook test mock "
+         "coverage bundle build release rollback alert dashboard metric log trace index user profile").split()
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def make_plan(tech_per_category, tasks_per_category, subtasks_per_task):
+    #LLM text does not repeat itself, so draw it from a seeded word list rather than a fixed string
+    rng = random.Random(42)
+    tech_stack = {"type": "Web Application"}
+    for category in CATEGORIES:
+        tech_stack[category] = [
+            {
+                "name": f"{category.title()} Tool {i+1}",
+                "description": " ".join(sentence(rng, 12) for _ in range(5)),
+                "docLink": f"https://docs.example.org/{category}/tool-{i+1}/getting-started"
+            }
+            for i in range(tech_per_category)
+        ]
+
+    tasks = []
+    for category in CATEGORIES:
+        for _ in range(tasks_per_category):
+            n = len(tasks) + 1
+            tasks.append({
+                "id": f"task-{n}",
+                "text": sentence(rng, 8),
+                "completed": False,
+                "category": category,
+                "subtasks": [
+                    {
+                        "id": f"subtask-{n}-{j+1}",
+                        "text": sentence(rng, 16),
+                        "completed": False
+                    }
+                    for j in range(subtasks_per_task)
+                ]
+            })
+
+    return {"success": True, "data": tasks, "tech_stack": tech_stack, "project_type": "Web Application", "priority": "Speed"}
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    try:
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse
+        default_path = lambda plan: JSONResponse(jsonable_encoder(plan)).body
+    except ImportError:
+        default_path = None
+
+    plans = {
+        "typical": make_plan(tech_per_category=2, tasks_per_category=4, subtasks_per_task=3),
+        "large": make_plan(tech_per_category=4, tasks_per_category=12, subtasks_per_task=8),
+    }
+
+    for name, plan in plans.items():
+        print(f"\n{name} plan ({len(plan['data'])} tasks)")
+        if default_path:
+            ms, _ = timed(lambda: default_path(plan), args.repeat)
+            print(f"  serialize, jsonable_encoder + JSONResponse: {ms:8.3f} ms")
+        ms, (body, etag) = timed(lambda: serialize_plan(plan), args.repeat)
+        print(f"  serialize, serialize_plan (incl. ETag):     {ms:8.3f} ms")
+
+        print(f"  raw:    {len(body):>8} bytes")
+        ms, gzipped = timed(lambda: compress(body, "gzip"), args.repeat)
+        print(f"  gzip:   {len(gzipped):>8} bytes  ({ms:.3f} ms)")
+        if brotli is not None:
+            ms, brotlied = timed(lambda: compress(body, "br"), args.repeat)
+            print(f"  br:     {len(brotlied):>8} bytes  ({ms:.3f} ms)")
+        print(f"  304:    {'0':>8} bytes  (If-None-Match: {etag})")
+
+if __name__ == "__main__":
+    main()
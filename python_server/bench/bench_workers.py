@@ -0,0 +1,87 @@
+"""
+Throughput vs. worker count for the production launcher, on the offline fake LLM backend.
+
+    python bench/bench_workers.py --workers 1 2 4 --concurrency 16 --requests 64
+
+Each run starts `gunicorn -c gunicorn.conf.py` with LLM_BACKEND=fake, fires
+--requests plans at --concurrency, and reports requests/s and latency.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIR))
+
+from loadtest.client import make_payload, wait_until_ready
+
+def post_plan(url):
+    started = time.perf_counter()
+    request = urllib.request.Request(url, data=make_payload(), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=300) as response:
+            response.read()
+            ok = response.status == 200
+    except urllib.error.URLError:
+        ok = False
+    return ok, time.perf_counter() - started
+
+def run(workers, concurrency, total, port, latency_ms):
+    env = dict(
+        os.environ,
+        LLM_BACKEND="fake",
+        FAKE_LLM_LATENCY_MS=str(latency_ms),
+        WEB_CONCURRENCY=str(workers),
+        BIND=f"127.0.0.1:{port}",
+        CREWAI_DISABLE_TELEMETRY="true",
+        OTEL_SDK_DISABLED="true",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_ready(f"{base_url}/ready", timeout=60)
+        url = f"{base_url}/api/generate-tasks"
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(post_plan, [url] * total))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=150)
+
+    latencies = sorted(latency for ok, latency in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    return {
+        "workers": workers,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0,
+        "errors": errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=int, default=200, help="fake LLM latency per call")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'errors':>7}")
+    for workers in args.workers:
+        row = run(workers, args.concurrency, args.requests, args.port, args.latency_ms)
+        print(f"{row['workers']:>8} {row['rps']:>8.2f} {row['p50']:>8.2f} {row['p95']:>8.2f} {row['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Import-time profile of the app.
+
+    python bench/import_profile.py [--top 15]
+
+Runs `python -X importtime` on `app.index` (which should stay light) and on
+the crew modules it defers, and prints the slowest top-level packages.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+def profile(statement):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=SERVER_DIR, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+
+    by_package = defaultdict(int)
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, _, indent, module = match.groups()
+        by_package[module.split(".")[0]] += int(self_us)
+        total_us += int(self_us)
+    return total_us, by_package
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    for label, statement in [
+        ("app.index (served at startup)", "import app.index"),
+        ("crews (deferred to warmup)", "import app.index; from app.warmup import import_heavy_modules; import_heavy_modules()"),
+    ]:
+        total_us, by_package = profile(statement)
+        print(f"\n{label}: {total_us / 1e6:.2f}s")
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {package:<30} {self_us / 1e3:>9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# Production server config: `gunicorn -c gunicorn.conf.py`
+import multiprocessing
+import os
+import sys
+import tempfile
+from pathlib import Path
+from dotenv import load_dotenv
+
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+load_dotenv(root_dir.parent / '.env')
+
+wsgi_app = "app.index:app"
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# Plans spend most of their time waiting on the LLM, so a few workers per core is plenty.
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# A plan fetched by id may land on any worker, so workers share one plan store on disk unless one is configured.
+# Set before the app is preloaded, which is when app/plan_store.py reads it.
+os.environ.setdefault("PLAN_STORE_DIR", str(Path(tempfile.gettempdir()) / "plansauce-plans"))
+
+# Import the app (and crewai) once in the master so workers share the pages copy-on-write.
+preload_app = True
+
+# A plan can take 30-60s plus retries; give in-flight plans time to finish on SIGTERM.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "120"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "180"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+# Recycle workers to contain memory growth; jitter keeps them from restarting together.
+max_requests = int(os.getenv("MAX_REQUESTS", "500"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "50"))
+
+accesslog = "-"
+
+def on_starting(server):
+    # app.index imports crewai lazily; pull it into the master so forked workers share it.
+    from app.warmup import import_heavy_modules
+    import_heavy_modules()
@@ -0,0 +1,30 @@
+"""
+Request helpers shared by the load test (loadtest/run.py) and the worker benchmark (bench/bench_workers.py).
+"""
+import itertools
+import json
+import time
+import urllib.error
+import urllib.request
+
+_request_numbers = itertools.count(1)
+
+def make_payload(unique: bool = True) -> bytes:
+    #a distinct description per request keeps the task cache from turning the run into a cache benchmark
+    suffix = f" (request {next(_request_numbers)})" if unique else ""
+    return json.dumps({
+        "description": "A web app for planning weekly meals and sharing grocery lists with friends" + suffix,
+        "priority": "Speed - Get a working MVP out quickly",
+        "background": {"known_tech": ["React", "Node.js"], "disliked_tech": [], "starred_tech": []}
+    }).encode()
+
+def wait_until_ready(url: str, timeout: float = 120) -> None:
+    """Poll `url` (the server's /ready, 503 until warmup finishes) until it answers 200."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
@@ -0,0 +1,180 @@
+"""
+Local stand-ins for the Gemini and Brave Search HTTP APIs.
+
+    python -m loadtest.fake_servers --gemini-port 9101 --brave-port 9102 \
+        --gemini-latency lognormal:800:0.5 --gemini-error-rate 0.02
+
+Point the app at them with GEMINI_API_BASE=http://127.0.0.1:9101
+and BRAVE_API_URL=http://127.0.0.1:9102/res/v1/web/search (loadtest/run.py does this for you).
+
+Latency specs: fixed:MS, uniform:MIN_MS:MAX_MS, lognormal:MEDIAN_MS:SIGMA.
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.fake_responses import fake_agent_answer, fake_json_answer
+
+class LatencyModel:
+    def __init__(self, spec: str):
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(param) for param in params]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        """Seconds to wait before answering."""
+        if self.kind == "fixed":
+            return self.params[0] / 1000
+        if self.kind == "uniform":
+            return random.uniform(self.params[0], self.params[1]) / 1000
+        median_ms, sigma = self.params
+        return random.lognormvariate(math.log(median_ms), sigma) / 1000
+
+class FakeBehaviour:
+    def __init__(self, latency: str, error_rate: float, padding_bytes: int):
+        self.latency = LatencyModel(latency)
+        self.error_rate = error_rate
+        self.padding_bytes = padding_bytes
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> bool:
+        """Sleep for one latency sample; return False if this request should fail."""
+        time.sleep(self.latency.sample())
+        failed = random.random() < self.error_rate
+        with self._lock:
+            self.requests += 1
+            self.errors += failed
+        return not failed
+
+    def padding(self) -> str:
+        return ("lorem ipsum " * (self.padding_bytes // 12 + 1))[:self.padding_bytes]
+
+def _collect_text(value) -> list:
+    """All "text" fields of a Gemini request body (contents, parts, system instruction)."""
+    texts = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == "text" and isinstance(item, str):
+                texts.append(item)
+            else:
+                texts.extend(_collect_text(item))
+    elif isinstance(value, list):
+        for item in value:
+            texts.extend(_collect_text(item))
+    return texts
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    behaviour: FakeBehaviour = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class FakeGeminiHandler(_JSONHandler):
+    """Answers generateContent calls in the Gemini REST format, whatever the model path."""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.behaviour.next():
+            status = random.choice([429, 500, 503])
+            self._send(status, {"error": {"code": status, "message": "Injected failure", "status": "UNAVAILABLE"}})
+            return
+
+        prompt = "\n".join(_collect_text(request.get("systemInstruction", {})) + _collect_text(request.get("contents", [])))
+        generation_config = request.get("generationConfig") or request.get("generation_config") or {}
+        json_mode = bool(generation_config.get("responseSchema")) or generation_config.get("responseMimeType") == "application/json"
+        answer = fake_json_answer(prompt) if json_mode else fake_agent_answer(prompt)
+        #padding would break a JSON mode document
+        if self.behaviour.padding_bytes and not json_mode:
+            answer += "\n\n" + self.behaviour.padding()
+
+        self._send(200, {
+            "candidates": [{
+                "content": {"parts": [{"text": answer}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0
+            }],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 4,
+                "candidatesTokenCount": len(answer) // 4,
+                "totalTokenCount": (len(prompt) + len(answer)) // 4
+            },
+            "modelVersion": "gemini-2.0-flash"
+        })
+
+class FakeBraveHandler(_JSONHandler):
+    """Answers web search calls in the Brave Search API format."""
+    results = 3
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        if not self.behaviour.next():
+            self._send(random.choice([429, 500]), {"type": "ErrorResponse", "error": {"detail": "Injected failure"}})
+            return
+
+        self._send(200, {"web": {"results": [
+            {
+                "title": f"{query} - result {i+1}",
+                "url": f"https://example.org/search/{i+1}?q={query.replace(' ', '+')}",
+                "description": f"About {query}. " + self.behaviour.padding()
+            }
+            for i in range(self.results)
+        ]}})
+
+def start_server(handler: type, port: int, behaviour: FakeBehaviour, **attributes) -> ThreadingHTTPServer:
+    handler_class = type(handler.__name__, (handler,), {"behaviour": behaviour, **attributes})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler_class)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--gemini-port", type=int, default=9101)
+    parser.add_argument("--gemini-latency", default="lognormal:800:0.5")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-padding-bytes", type=int, default=0, help="extra text appended to each answer")
+    parser.add_argument("--brave-port", type=int, default=9102)
+    parser.add_argument("--brave-latency", default="lognormal:300:0.4")
+    parser.add_argument("--brave-error-rate", type=float, default=0.0)
+    parser.add_argument("--brave-results", type=int, default=3)
+    parser.add_argument("--brave-padding-bytes", type=int, default=200, help="extra text in each result description")
+    args = parser.parse_args()
+
+    gemini = FakeBehaviour(args.gemini_latency, args.gemini_error_rate, args.gemini_padding_bytes)
+    brave = FakeBehaviour(args.brave_latency, args.brave_error_rate, args.brave_padding_bytes)
+    start_server(FakeGeminiHandler, args.gemini_port, gemini)
+    start_server(FakeBraveHandler, args.brave_port, brave, results=args.brave_results)
+    print(f"Fake Gemini on :{args.gemini_port}, fake Brave on :{args.brave_port}", flush=True)
+
+    try:
+        while True:
+            time.sleep(10)
+            print(f"gemini {gemini.requests} requests / {gemini.errors} errors, "
+                  f"brave {brave.requests} requests / {brave.errors} errors", flush=True)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
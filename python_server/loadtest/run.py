@@ -0,0 +1,136 @@
+"""
+Drive the real app (app.index:app under gunicorn) with rising concurrency against the fake Gemini and Brave servers.
+
+    python -m loadtest.run --workers 4 --concurrency 1 4 16 32 --duration 60 \
+        --gemini-latency lognormal:800:0.5 --gemini-error-rate 0.02
+
+Options not listed below are passed on to loadtest/fake_servers.py. For each
+concurrency level it reports throughput, latency percentiles, the error
+rate and the resident memory of every gunicorn worker at the end of the step.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from loadtest.client import make_payload, wait_until_ready
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+def worker_rss_mb(master_pid: int) -> dict:
+    """Resident memory of each child of the gunicorn master, from /proc (Linux only)."""
+    try:
+        children = Path(f"/proc/{master_pid}/task/{master_pid}/children").read_text().split()
+    except OSError:
+        return {}
+
+    rss = {}
+    for pid in children:
+        try:
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    rss[int(pid)] = int(line.split()[1]) / 1024
+        except OSError:
+            continue
+    return rss
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def run_step(url: str, concurrency: int, duration: float, timeout: float, unique: bool) -> dict:
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.time() + duration
+
+    def client():
+        while time.time() < deadline:
+            started = time.perf_counter()
+            request = urllib.request.Request(url, data=make_payload(unique), headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+                ok = True
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                ok = False
+            with lock:
+                (latencies if ok else errors).append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies) + len(errors)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p99": percentile(latencies, 0.99),
+        "error_rate": len(errors) / total if total else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=60, help="seconds per concurrency step")
+    parser.add_argument("--timeout", type=float, default=300, help="client timeout per request")
+    parser.add_argument("--repeat-payload", action="store_true", help="send the same plan request every time (measures cache hits)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--gemini-port", type=int, default=9101)
+    parser.add_argument("--brave-port", type=int, default=9102)
+    args, fake_args = parser.parse_known_args()
+
+    fakes = subprocess.Popen(
+        [sys.executable, "-m", "loadtest.fake_servers",
+         "--gemini-port", str(args.gemini_port), "--brave-port", str(args.brave_port), *fake_args],
+        cwd=SERVER_DIR
+    )
+    env = dict(
+        os.environ,
+        LLM_BACKEND="gemini",
+        GEMINI_API_KEY="fake",
+        GEMINI_API_BASE=f"http://127.0.0.1:{args.gemini_port}",
+        BRAVE_API_KEY="fake",
+        BRAVE_API_URL=f"http://127.0.0.1:{args.brave_port}/res/v1/web/search",
+        WEB_CONCURRENCY=str(args.workers),
+        BIND=f"127.0.0.1:{args.port}",
+        CREWAI_DISABLE_TELEMETRY="true",
+        OTEL_SDK_DISABLED="true",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_until_ready(f"{base_url}/ready")
+        print(f"{'conc':>5} {'reqs':>6} {'req/s':>7} {'p50 s':>7} {'p90 s':>7} {'p99 s':>7} {'errors':>7}  worker RSS MB")
+        for concurrency in args.concurrency:
+            row = run_step(f"{base_url}/api/generate-tasks", concurrency, args.duration, args.timeout, not args.repeat_payload)
+            rss = " ".join(f"{mb:.0f}" for _, mb in sorted(worker_rss_mb(server.pid).items()))
+            print(f"{row['concurrency']:>5} {row['requests']:>6} {row['rps']:>7.2f} {row['p50']:>7.2f} "
+                  f"{row['p90']:>7.2f} {row['p99']:>7.2f} {row['error_rate']:>6.1%}  {rss}", flush=True)
+    finally:
+        server.terminate()
+        fakes.terminate()
+        server.wait(timeout=150)
+        fakes.wait(timeout=10)
+
+if __name__ == "__main__":
+    main()